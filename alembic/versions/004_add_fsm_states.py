@@ -0,0 +1,32 @@
+"""Таблица состояний FSM (персистентное хранилище aiogram)
+
+Revision ID: 004
+Revises: 003
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '004'
+down_revision = '003'
+
+
+def upgrade():
+    op.create_table(
+        'fsm_states',
+        sa.Column('bot_id', sa.BigInteger(), primary_key=True),
+        sa.Column('chat_id', sa.BigInteger(), primary_key=True),
+        sa.Column('user_id', sa.BigInteger(), primary_key=True),
+        sa.Column('thread_id', sa.BigInteger(), primary_key=True, server_default='0'),
+        sa.Column('destiny', sa.String(64), primary_key=True, server_default='default'),
+        sa.Column('state', sa.String(255), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=False, server_default='{}'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_fsm_states_expires_at', 'fsm_states', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_fsm_states_expires_at')
+    op.drop_table('fsm_states')
@@ -0,0 +1,35 @@
+"""Таблица незавершённых прохождений тестов
+
+Revision ID: 005
+Revises: 004
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '005'
+down_revision = '004'
+
+
+def upgrade():
+    op.create_table(
+        'test_sessions',
+        sa.Column('telegram_id', sa.BigInteger(), primary_key=True),
+        sa.Column('test_id', sa.Integer(), nullable=False),
+        sa.Column('question_ids', sa.JSON(), nullable=False),
+        sa.Column('current_index', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('time_limit', sa.Integer(), nullable=False),
+        sa.Column('deadline', sa.DateTime(), nullable=True),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('message_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_test_sessions_deadline', 'test_sessions', ['deadline'])
+    op.create_index('ix_test_sessions_updated_at', 'test_sessions', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_test_sessions_updated_at')
+    op.drop_index('ix_test_sessions_deadline')
+    op.drop_table('test_sessions')
@@ -0,0 +1,25 @@
+"""Таблица file_id загруженных в Telegram файлов
+
+Revision ID: 006
+Revises: 005
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '006'
+down_revision = '005'
+
+
+def upgrade():
+    op.create_table(
+        'media_files',
+        sa.Column('path', sa.String(1024), primary_key=True),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('file_id', sa.String(255), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('media_files')
@@ -0,0 +1,39 @@
+"""Очередь исходящих сообщений
+
+Revision ID: 007
+Revises: 006
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '007'
+down_revision = '006'
+
+
+def upgrade():
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('idempotency_key', sa.String(255), nullable=False),
+        sa.Column('batch', sa.String(128), nullable=True),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('photo', sa.String(255), nullable=True),
+        sa.Column('parse_mode', sa.String(16), nullable=True),
+        sa.Column('status', sa.String(16), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('idempotency_key', name='uq_outbox_idempotency_key'),
+    )
+    op.create_index('ix_outbox_status_next_attempt', 'outbox', ['status', 'next_attempt_at'])
+    op.create_index('ix_outbox_batch', 'outbox', ['batch'])
+
+
+def downgrade():
+    op.drop_index('ix_outbox_batch')
+    op.drop_index('ix_outbox_status_next_attempt')
+    op.drop_table('outbox')
@@ -0,0 +1,27 @@
+"""Триграммные индексы для нечёткого поиска по меню (pg_trgm)
+
+Revision ID: 008
+Revises: 007
+"""
+from alembic import op
+
+
+revision = '008'
+down_revision = '007'
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_menu_items_name_trgm "
+        "ON menu_items USING gin (name gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_menu_items_composition_trgm "
+        "ON menu_items USING gin (composition gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_menu_items_composition_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_menu_items_name_trgm")
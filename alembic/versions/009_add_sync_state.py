@@ -0,0 +1,26 @@
+"""Отпечатки разделов таблицы для пропуска неизменившихся при синхронизации
+
+Revision ID: 009
+Revises: 008
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '009'
+down_revision = '008'
+
+
+def upgrade():
+    op.create_table(
+        'sync_state',
+        sa.Column('section', sa.String(50), primary_key=True),
+        sa.Column('branch', sa.String(255), primary_key=True),
+        sa.Column('digest', sa.String(64), nullable=False),
+        sa.Column('synced_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('checked_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('sync_state')
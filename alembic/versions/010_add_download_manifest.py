@@ -0,0 +1,28 @@
+"""Манифест скачанных файлов обучения (ETag, Last-Modified, sha256)
+
+Revision ID: 010
+Revises: 009
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '010'
+down_revision = '009'
+
+
+def upgrade():
+    op.create_table(
+        'download_manifest',
+        sa.Column('path', sa.String(1024), primary_key=True),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('etag', sa.String(255), nullable=True),
+        sa.Column('last_modified', sa.String(64), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sha256', sa.String(64), nullable=False),
+        sa.Column('checked_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('download_manifest')
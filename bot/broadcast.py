@@ -0,0 +1,132 @@
+"""Лимиты отправки сообщений Telegram и отображение хода рассылки"""
+
+import asyncio
+import time
+from typing import Awaitable, Dict, Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import Message
+
+from config import settings
+
+
+class TokenBucket:
+    """Ведро токенов: не больше rate операций в секунду, всплеск до capacity"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Остановить выдачу токенов (Telegram вернул RetryAfter)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatThrottle:
+    """Минимальный интервал между сообщениями в один чат"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_allowed: Dict[int, float] = {}
+
+    async def wait(self, chat_id: int) -> None:
+        now = time.monotonic()
+        allowed = self._next_allowed.get(chat_id, 0.0)
+        self._next_allowed[chat_id] = max(now, allowed) + self.interval
+        if allowed > now:
+            await asyncio.sleep(allowed - now)
+        if len(self._next_allowed) > 10000:
+            self._next_allowed = {k: v for k, v in self._next_allowed.items() if v > now}
+
+
+# Общие для всего процесса лимиты: ~30 сообщений/с на бота и ~1/с в один чат
+global_bucket = TokenBucket(settings.BROADCAST_RATE)
+chat_throttle = ChatThrottle(1.0)
+
+
+# Ответы Bad Request, означающие, что чата для бота больше нет
+_UNAVAILABLE_CHAT_ERRORS = ("chat not found", "user not found")
+
+
+def is_chat_unavailable(error: Exception) -> bool:
+    """
+    Получатель недоступен навсегда: бот заблокирован или чата нет.
+    Прочие Bad Request (неверная разметка, битое фото) — ошибки самого
+    сообщения, их нужно считать неудачей и показывать текст ошибки.
+    """
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    if isinstance(error, TelegramBadRequest):
+        return any(marker in error.message.lower() for marker in _UNAVAILABLE_CHAT_ERRORS)
+    return False
+
+
+class BroadcastStats:
+    """Счётчики рассылки"""
+
+    __slots__ = ("total", "sent", "failed", "blocked")
+
+    def __init__(self, total: int):
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0  # бот заблокирован / чат недоступен
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+
+def progress_editor(status_message: Message, title: str, reply_markup=None):
+    """on_progress, который показывает ход рассылки в статусном сообщении"""
+    last_text = None
+
+    async def on_progress(stats: BroadcastStats) -> None:
+        nonlocal last_text
+        finished = stats.done >= stats.total
+        text = f"{'✅' if finished else '⏳'} <b>{title}</b>\n\nОтправлено: {stats.sent} из {stats.total}"
+        if stats.blocked:
+            text += f"\nНедоступны: {stats.blocked}"
+        if stats.failed:
+            text += f"\nОшибки: {stats.failed}"
+        if text == last_text:
+            return
+        last_text = text
+        await status_message.edit_text(
+            text,
+            reply_markup=reply_markup if finished else None,
+            parse_mode="HTML",
+        )
+
+    return on_progress
+
+
+# Ссылки на фоновые рассылки, чтобы задачи не собрал сборщик мусора
+_background: set = set()
+
+
+def run_in_background(coro: Awaitable) -> asyncio.Task:
+    """Запустить рассылку фоном, не задерживая обработчик"""
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
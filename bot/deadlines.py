@@ -0,0 +1,171 @@
+"""Единый планировщик дедлайнов на event loop (вместо задачи на каждый таймер)"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Обработчик пачки истёкших дедлайнов: [(key, payload), ...]
+BatchHandler = Callable[[List[Tuple[Hashable, Any]]], Awaitable[None]]
+
+
+class _Entry:
+    __slots__ = ("deadline", "seq", "key", "payload", "cancelled")
+
+    def __init__(self, deadline: float, seq: int, key: Hashable, payload: Any):
+        self.deadline = deadline
+        self.seq = seq
+        self.key = key
+        self.payload = payload
+        self.cancelled = False
+
+    def __lt__(self, other: "_Entry") -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class DeadlineScheduler:
+    """
+    Куча дедлайнов с одной фоновой задачей.
+
+    На каждый ключ — не больше одного активного дедлайна: повторный schedule()
+    заменяет предыдущий. Отмена помечает запись и убирает её из индекса (O(1)),
+    сама запись выбрасывается из кучи при извлечении; если отменённых записей
+    становится больше половины, куча перестраивается. Дедлайны, наступившие
+    за один проход, передаются обработчику одной пачкой.
+    """
+
+    def __init__(self, name: str, resolution: float = 0.05):
+        self.name = name
+        self.resolution = resolution  # дедлайны в пределах этого окна срабатывают вместе
+        self._heap: List[_Entry] = []
+        self._index: Dict[Hashable, _Entry] = {}
+        self._seq = itertools.count()
+        self._cancelled_in_heap = 0
+        self._handler: Optional[BatchHandler] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._handler_tasks: Set[asyncio.Task] = set()
+        # Метрики
+        self.fired_total = 0
+        self.cancelled_total = 0
+        self.batches_total = 0
+        self.max_lag = 0.0
+
+    def start(self, handler: BatchHandler) -> None:
+        """Запустить фоновую задачу (вызывать из работающего event loop)"""
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(), name=f"deadlines:{self.name}")
+
+    async def stop(self) -> None:
+        """Остановить планировщик (незавершённые обработчики не прерываются)"""
+        if self._runner:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    def schedule(self, key: Hashable, delay: float, payload: Any = None) -> None:
+        """Назначить (или перенести) дедлайн для ключа через delay секунд"""
+        self._discard(key)
+        loop = asyncio.get_running_loop()
+        entry = _Entry(loop.time() + max(delay, 0.0), next(self._seq), key, payload)
+        self._index[key] = entry
+        heapq.heappush(self._heap, entry)
+        # Будим цикл, только если новый дедлайн стал ближайшим
+        if self._heap[0] is entry and self._wakeup:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отменить дедлайн ключа; False — если его не было"""
+        if self._discard(key):
+            self.cancelled_total += 1
+            return True
+        return False
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики для логов и мониторинга"""
+        return {
+            "pending": len(self._index),
+            "heap_size": len(self._heap),
+            "fired_total": self.fired_total,
+            "cancelled_total": self.cancelled_total,
+            "batches_total": self.batches_total,
+            "running_handlers": len(self._handler_tasks),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
+
+    def _discard(self, key: Hashable) -> bool:
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return False
+        entry.cancelled = True
+        self._cancelled_in_heap += 1
+        if self._cancelled_in_heap > len(self._heap) // 2 and len(self._heap) > 64:
+            self._compact()
+        return True
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if not entry.cancelled]
+        heapq.heapify(self._heap)
+        self._cancelled_in_heap = 0
+
+    def _pop_due(self, now: float) -> List[_Entry]:
+        due = []
+        while self._heap and self._heap[0].deadline <= now + self.resolution:
+            entry = heapq.heappop(self._heap)
+            if entry.cancelled:
+                self._cancelled_in_heap -= 1
+                continue
+            del self._index[entry.key]
+            due.append(entry)
+        return due
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0].cancelled:
+                heapq.heappop(self._heap)
+                self._cancelled_in_heap -= 1
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            timeout = self._heap[0].deadline - loop.time()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+            now = loop.time()
+            due = self._pop_due(now)
+            if not due:
+                continue
+
+            self.max_lag = max(self.max_lag, now - due[0].deadline)
+            self.fired_total += len(due)
+            self.batches_total += 1
+            task = asyncio.create_task(self._dispatch([(e.key, e.payload) for e in due]))
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._handler_tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Hashable, Any]]) -> None:
+        try:
+            await self._handler(batch)
+        except Exception as e:
+            logger.error(f"Ошибка обработки дедлайнов {self.name}: {e}", exc_info=True)
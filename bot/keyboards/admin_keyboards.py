@@ -238,6 +238,7 @@ def get_sync_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text="🔄 Синхронизировать всё", callback_data="admin_sync:all")],
+            [InlineKeyboardButton(text="♻️ Принудительно (все разделы)", callback_data="admin_sync:force")],
             [InlineKeyboardButton(text="◀️ Назад", callback_data="admin:back")],
         ]
     )
@@ -7,9 +7,16 @@ from aiogram.client.default import DefaultBotProperties
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from config import settings
-from database.database import init_db
+from database.database import init_db, warm_up_pool
+from database.invalidation import invalidation_bus
+from integrations.downloader import downloader
+from integrations.sheets_client import refresh_sheets_token
 from bot.routers import setup_routers
 from bot.middlewares import AuthMiddleware
+from bot.webhook import run_webhook
+from bot.storage import create_storage, cleanup_fsm_states
+from bot.outbox import outbox_workers, cleanup_outbox
+from bot.routers.tests import sweep_test_sessions, start_question_timers, question_timers
 
 # Настройка логирования — INFO для production (синхронизация, привязки, ошибки)
 logging.basicConfig(
@@ -44,17 +51,22 @@ async def main():
     # Инициализация БД
     logger.info("Инициализация базы данных...")
     await init_db()
+    await warm_up_pool()
+    # Сброс кэшей по изменениям из других процессов
+    invalidation_bus.start()
 
     # Создание бота и диспетчера
     bot = Bot(
         token=settings.BOT_TOKEN,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher()
+    storage = create_storage()
+    dp = Dispatcher(storage=storage)
 
     # Подключение middleware
     dp.message.middleware(AuthMiddleware())
     dp.callback_query.middleware(AuthMiddleware())
+    dp.inline_query.middleware(AuthMiddleware())
 
     # Подключение роутеров
     dp.include_router(setup_routers())
@@ -62,15 +74,41 @@ async def main():
     # Планировщик автосинхронизации (каждые 4 часа: 2:00, 6:00, 10:00, 14:00, 18:00, 22:00)
     scheduler = AsyncIOScheduler(timezone="Europe/Moscow")
     scheduler.add_job(auto_sync, "interval", hours=4, max_instances=1, id="auto_sync")
+    # Очистка просроченных состояний FSM
+    scheduler.add_job(
+        cleanup_fsm_states, "interval", hours=1, args=[storage], max_instances=1, id="fsm_cleanup"
+    )
+    # Таймауты вопросов, потерянные при перезапуске, и брошенные тесты
+    scheduler.add_job(
+        sweep_test_sessions, "interval", seconds=30, args=[bot], max_instances=1, id="test_sessions_sweep"
+    )
+    # Удаление старых обработанных сообщений из очереди
+    scheduler.add_job(cleanup_outbox, "interval", hours=24, max_instances=1, id="outbox_cleanup")
+    # Токен Google Sheets обновляется заранее, а не на первом запросе после истечения
+    scheduler.add_job(refresh_sheets_token, "interval", minutes=10, max_instances=1, id="sheets_token_refresh")
     scheduler.start()
     logger.info("Автосинхронизация запланирована каждые 4 часа")
 
-    # Запуск polling
+    # Фоновые задачи: таймеры вопросов и отправка сообщений из очереди
+    await start_question_timers(bot)
+    outbox_workers.start(bot, settings.OUTBOX_WORKERS)
+
+    # Запуск: webhook или polling (по умолчанию)
     logger.info("Бот запущен и готов к работе!")
     try:
-        await dp.start_polling(bot)
+        if settings.BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # Снимаем webhook, если бот раньше работал в этом режиме
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     finally:
         scheduler.shutdown()
+        await question_timers.stop()
+        await outbox_workers.stop()
+        await invalidation_bus.stop()
+        await downloader.close()
+        await storage.close()
         await bot.session.close()
 
 
@@ -0,0 +1,126 @@
+"""Реестр Telegram file_id для локальных файлов (фото блюд, PDF, логотип)"""
+
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from database.database import async_session_maker
+from database.repositories import MediaRepository
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaRegistry:
+    """
+    Отправка локальных файлов с повторным использованием file_id.
+
+    Файл загружается в Telegram один раз; полученный file_id сохраняется
+    в таблице media_files вместе с sha256 содержимого. Пока содержимое
+    не изменилось, следующие отправки идут по file_id. Хэш пересчитывается,
+    только когда у файла меняются mtime или размер.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}  # путь -> (mtime_ns, size, sha256)
+        self._file_ids: Dict[str, Tuple[str, str]] = {}  # путь -> (sha256, file_id)
+
+    async def content_hash(self, path: PathLike) -> str:
+        """sha256 файла (с запоминанием по mtime и размеру)"""
+        key = str(path)
+        stat = Path(path).stat()
+        cached = self._hashes.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        digest = await asyncio.to_thread(_sha256, Path(path))
+        self._hashes[key] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    async def get_file_id(self, path: PathLike) -> Optional[str]:
+        """file_id для текущего содержимого файла, если он уже загружался"""
+        key = str(path)
+        digest = await self.content_hash(path)
+        cached = self._file_ids.get(key)
+        if cached and cached[0] == digest:
+            return cached[1]
+        async with async_session_maker() as session:
+            file_id = await MediaRepository(session).get_file_id(key, digest)
+        if file_id:
+            self._file_ids[key] = (digest, file_id)
+        return file_id
+
+    async def register(self, path: PathLike, file_id: str) -> None:
+        """Запомнить file_id для текущего содержимого файла"""
+        key = str(path)
+        digest = await self.content_hash(path)
+        self._file_ids[key] = (digest, file_id)
+        async with async_session_maker() as session:
+            await MediaRepository(session).save(key, digest, file_id)
+
+    async def invalidate(self, path: PathLike) -> None:
+        """Забыть file_id и хэш файла (файл заменён)"""
+        key = str(path)
+        self._hashes.pop(key, None)
+        self._file_ids.pop(key, None)
+        async with async_session_maker() as session:
+            await MediaRepository(session).delete(key)
+
+    async def send_photo(self, message: Message, path: PathLike, **kwargs: Any) -> Message:
+        """Отправить фото в чат сообщения"""
+        return await self._send(
+            path,
+            lambda media: message.answer_photo(photo=media, **kwargs),
+            lambda sent: sent.photo[-1].file_id,
+        )
+
+    async def send_document(self, message: Message, path: PathLike, **kwargs: Any) -> Message:
+        """Отправить документ в чат сообщения"""
+        return await self._send(
+            path,
+            lambda media: message.answer_document(document=media, **kwargs),
+            lambda sent: sent.document.file_id,
+        )
+
+    async def _send(
+        self,
+        path: PathLike,
+        send: Callable[[Any], Awaitable[Message]],
+        extract_file_id: Callable[[Message], str],
+    ) -> Message:
+        try:
+            file_id = await self.get_file_id(path)
+        except Exception as e:
+            logger.warning(f"Не удалось проверить кэш file_id для {path}: {e}")
+            file_id = None
+
+        if file_id:
+            try:
+                return await send(file_id)
+            except TelegramBadRequest as e:
+                # file_id больше не действителен — загружаем файл заново
+                logger.warning(f"file_id для {path} отклонён Telegram: {e}")
+                await self.invalidate(path)
+
+        sent = await send(FSInputFile(path))
+        try:
+            await self.register(path, extract_file_id(sent))
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить file_id для {path}: {e}")
+        return sent
+
+
+media_registry = MediaRegistry()
@@ -1,8 +1,9 @@
 from typing import Any, Awaitable, Callable, Dict
 
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject, Message, CallbackQuery
+from aiogram.types import TelegramObject, Message, CallbackQuery, InlineQuery
 
+from database.cache import MISSING, user_cache
 from database.database import async_session_maker
 from database.repositories import UserRepository
 
@@ -20,14 +21,21 @@ class AuthMiddleware(BaseMiddleware):
         telegram_id = None
         if isinstance(event, Message):
             telegram_id = event.from_user.id if event.from_user else None
-        elif isinstance(event, CallbackQuery):
+        elif isinstance(event, (CallbackQuery, InlineQuery)):
             telegram_id = event.from_user.id if event.from_user else None
         
         if telegram_id:
-            async with async_session_maker() as session:
-                user_repo = UserRepository(session)
-                user = await user_repo.get_by_telegram_id(telegram_id)
-                data["user"] = user
+            # Сначала кэш (в т.ч. закэшированные промахи), затем БД
+            user = user_cache.get(telegram_id, MISSING)
+            if user is MISSING:
+                # Привязка, завершившаяся во время запроса, не должна
+                # перетереться устаревшим промахом
+                generation = user_cache.generation
+                async with async_session_maker() as session:
+                    user_repo = UserRepository(session)
+                    user = await user_repo.get_by_telegram_id(telegram_id)
+                user_cache.set(telegram_id, user, generation=generation)
+            data["user"] = user
         else:
             data["user"] = None
         
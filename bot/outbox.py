@@ -0,0 +1,213 @@
+"""Очередь исходящих сообщений: обработчики ставят в очередь, воркеры отправляют"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import Message
+
+from config import settings
+from database.database import async_session_maker
+from database.models import OutboxMessage
+from database.repositories import OutboxRepository
+from bot.broadcast import (
+    BroadcastStats,
+    chat_throttle,
+    global_bucket,
+    is_chat_unavailable,
+    progress_editor,
+    run_in_background,
+)
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд сообщение закреплено за воркером, забравшим его из очереди
+LEASE_SECONDS = 120
+# Размер пачки, которую воркер забирает за один запрос
+CLAIM_BATCH_SIZE = 10
+
+# Будит воркеры этого процесса сразу после постановки сообщений в очередь
+_wakeup = asyncio.Event()
+
+
+async def enqueue(
+    chat_ids: Iterable[int],
+    key: str,
+    text: Optional[str] = None,
+    photo: Optional[str] = None,
+    batch: Optional[str] = None,
+    parse_mode: Optional[str] = "HTML",
+) -> int:
+    """
+    Поставить сообщение в очередь для каждого получателя.
+
+    key — идемпотентный ключ события: для получателя формируется ключ
+    f"{key}:{chat_id}", повторная постановка того же события игнорируется.
+    Возвращает количество новых сообщений в очереди.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "idempotency_key": f"{key}:{chat_id}",
+            "batch": batch,
+            "chat_id": chat_id,
+            "text": text,
+            "photo": photo,
+            "parse_mode": parse_mode,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for chat_id in dict.fromkeys(chat_ids)
+    ]
+    async with async_session_maker() as session:
+        added = await OutboxRepository(session).enqueue(rows)
+    if added:
+        _wakeup.set()
+    return added
+
+
+async def _deliver(bot: Bot, message: OutboxMessage) -> None:
+    """Отправить одно сообщение и записать результат"""
+    error = None
+    retry_delay = None
+    count_attempt = True
+    status = "failed"
+
+    await chat_throttle.wait(message.chat_id)
+    await global_bucket.acquire()
+    # Ожидание лимитов могло съесть аренду пачки: продлеваем её перед
+    # отправкой, а если запись уже забрал другой воркер — не отправляем
+    async with async_session_maker() as session:
+        if not await OutboxRepository(session).renew(message, LEASE_SECONDS):
+            logger.info(f"Очередь: аренда сообщения {message.id} истекла, пропускаем")
+            return
+    try:
+        if message.photo:
+            await bot.send_photo(
+                message.chat_id, photo=message.photo, caption=message.text, parse_mode=message.parse_mode
+            )
+        else:
+            await bot.send_message(message.chat_id, message.text, parse_mode=message.parse_mode)
+    except TelegramRetryAfter as e:
+        # Лимит Telegram — притормаживаем все отправки процесса, попытку не засчитываем
+        global_bucket.pause(e.retry_after)
+        error, retry_delay, count_attempt = str(e), e.retry_after, False
+    except (TelegramForbiddenError, TelegramBadRequest) as e:
+        # Повторять бессмысленно: либо чат недоступен, либо сообщение некорректно
+        error = str(e)
+        if is_chat_unavailable(e):
+            status = "blocked"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            status = "failed"
+        else:
+            retry_delay = min(5 * 2 ** message.attempts, 600)
+
+    async with async_session_maker() as session:
+        repo = OutboxRepository(session)
+        if error is None:
+            owned = await repo.mark_sent(message)
+        elif retry_delay is not None:
+            owned = await repo.reschedule(message, retry_delay, error, count_attempt=count_attempt)
+        else:
+            logger.warning(f"Очередь: сообщение {message.id} в чат {message.chat_id} не отправлено: {error}")
+            owned = await repo.mark_failed(message, status, error)
+    if not owned:
+        logger.warning(f"Очередь: результат сообщения {message.id} не записан — аренда потеряна")
+
+
+class OutboxWorkers:
+    """Пул воркеров, отправляющих сообщения из очереди"""
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self, bot: Bot, count: int) -> None:
+        for number in range(count):
+            self._tasks.append(asyncio.create_task(self._run(bot), name=f"outbox-worker-{number}"))
+        logger.info(f"Очередь сообщений: запущено воркеров: {count}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, bot: Bot) -> None:
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    messages = await OutboxRepository(session).claim(CLAIM_BATCH_SIZE, LEASE_SECONDS)
+            except Exception as e:
+                logger.error(f"Очередь: ошибка чтения: {e}")
+                messages = []
+
+            if not messages:
+                _wakeup.clear()
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), settings.OUTBOX_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            for message in messages:
+                try:
+                    await _deliver(bot, message)
+                except Exception as e:
+                    # Запись вернётся в очередь по истечении аренды
+                    logger.error(f"Очередь: ошибка обработки сообщения {message.id}: {e}")
+
+
+outbox_workers = OutboxWorkers()
+
+
+async def _watch_batch(batch: str, total: int, on_progress, interval: float, timeout: float) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        await asyncio.sleep(interval)
+        stats = BroadcastStats(total)
+        try:
+            async with async_session_maker() as session:
+                counts = await OutboxRepository(session).get_batch_progress(batch)
+            stats.sent = counts.get("sent", 0)
+            stats.blocked = counts.get("blocked", 0)
+            stats.failed = counts.get("failed", 0)
+            await on_progress(stats)
+        except Exception as e:
+            logger.debug(f"Очередь: не удалось обновить прогресс рассылки: {e}")
+        if stats.done >= total or loop.time() > deadline:
+            return
+
+
+def watch_batch(
+    batch: str,
+    total: int,
+    status_message: Message,
+    title: str,
+    reply_markup=None,
+    interval: float = 3.0,
+    timeout: float = 3600.0,
+) -> None:
+    """Фоном показывать ход рассылки в статусном сообщении менеджера"""
+    on_progress = progress_editor(status_message, title, reply_markup=reply_markup)
+    run_in_background(_watch_batch(batch, total, on_progress, interval, timeout))
+
+
+async def cleanup_outbox() -> None:
+    """Удалить старые обработанные сообщения"""
+    try:
+        async with async_session_maker() as session:
+            removed = await OutboxRepository(session).delete_finished(
+                datetime.utcnow() - timedelta(days=7)
+            )
+        if removed:
+            logger.info(f"Очередь: удалено старых сообщений: {removed}")
+    except Exception as e:
+        logger.error(f"Ошибка очистки очереди сообщений: {e}")
@@ -8,6 +8,7 @@ from .tests import router as tests_router
 from .lists import router as lists_router
 from .motivation import router as motivation_router
 from .checklist import router as checklist_router
+from .inline import router as inline_router
 
 # Админские роутеры
 from .admin_main import router as admin_main_router
@@ -48,6 +49,7 @@ def setup_routers() -> Router:
     router.include_router(lists_router)
     router.include_router(motivation_router)
     router.include_router(checklist_router)
+    router.include_router(inline_router)
 
     return router
 
@@ -2,11 +2,9 @@
 
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
-from sqlalchemy import update
 
 from database.database import async_session_maker
 from database.repositories import TestRepository
-from database.models import Test
 from bot.keyboards.admin_keyboards import get_attest_keyboard
 
 router = Router()
@@ -42,10 +40,7 @@ async def admin_attest_on(callback: CallbackQuery, user=None):
         return
 
     async with async_session_maker() as session:
-        await session.execute(
-            update(Test).where(Test.branch == user.branch).values(is_active=True)
-        )
-        await session.commit()
+        await TestRepository(session).set_active_for_branch(user.branch, True)
 
     await callback.message.edit_text(
         "📝 <b>Аттестация</b>\n\n🟢 Все тесты <b>включены</b>.",
@@ -62,10 +57,7 @@ async def admin_attest_off(callback: CallbackQuery, user=None):
         return
 
     async with async_session_maker() as session:
-        await session.execute(
-            update(Test).where(Test.branch == user.branch).values(is_active=False)
-        )
-        await session.commit()
+        await TestRepository(session).set_active_for_branch(user.branch, False)
 
     await callback.message.edit_text(
         "📝 <b>Аттестация</b>\n\n🔴 Все тесты <b>выключены</b>.",
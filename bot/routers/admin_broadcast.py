@@ -1,6 +1,5 @@
 """Рассылка сообщений (админ)"""
 
-import asyncio
 import logging
 
 from aiogram import Router, F
@@ -12,6 +11,7 @@ logger = logging.getLogger(__name__)
 
 from database.database import async_session_maker
 from database.repositories import UserRepository
+from bot.outbox import enqueue, watch_batch
 
 router = Router()
 
@@ -49,20 +49,13 @@ async def admin_broadcast_text(message: Message, state: FSMContext, user=None):
         user_repo = UserRepository(session)
         tg_users = await user_repo.get_all_with_telegram()
 
-    sent = 0
-    for tg_user in tg_users:
-        try:
-            await message.bot.send_message(
-                tg_user.telegram_id,
-                f"📢 <b>Объявление</b>\n\n{message.text}",
-                parse_mode="HTML",
-            )
-            sent += 1
-            await asyncio.sleep(0.05)
-        except Exception as e:
-            logger.warning(f"Рассылка: не удалось отправить {tg_user.full_name}: {e}")
+    # Повторная доставка того же апдейта не продублирует рассылку
+    batch = f"broadcast:{message.chat.id}:{message.message_id}"
+    chat_ids = [u.telegram_id for u in tg_users]
+    await enqueue(chat_ids, key=batch, batch=batch, text=f"📢 <b>Объявление</b>\n\n{message.text}")
 
-    await message.answer(f"✅ Сообщение отправлено {sent} сотрудникам.")
+    status = await message.answer(f"⏳ Рассылка: 0 из {len(chat_ids)}")
+    watch_batch(batch, len(chat_ids), status, "Рассылка сообщения")
 
 
 @router.message(BroadcastStates.message, F.photo)
@@ -81,21 +74,14 @@ async def admin_broadcast_photo(message: Message, state: FSMContext, user=None):
     photo_id = message.photo[-1].file_id
     caption = message.caption or ""
 
-    sent = 0
-    for tg_user in tg_users:
-        try:
-            await message.bot.send_photo(
-                tg_user.telegram_id,
-                photo=photo_id,
-                caption=f"📢 <b>Объявление</b>\n\n{caption}",
-                parse_mode="HTML",
-            )
-            sent += 1
-            await asyncio.sleep(0.05)
-        except Exception as e:
-            logger.warning(f"Рассылка фото: не удалось отправить {tg_user.full_name}: {e}")
-
-    await message.answer(f"✅ Фото отправлено {sent} сотрудникам.")
+    batch = f"broadcast:{message.chat.id}:{message.message_id}"
+    chat_ids = [u.telegram_id for u in tg_users]
+    await enqueue(
+        chat_ids, key=batch, batch=batch, photo=photo_id, text=f"📢 <b>Объявление</b>\n\n{caption}"
+    )
+
+    status = await message.answer(f"⏳ Рассылка: 0 из {len(chat_ids)}")
+    watch_batch(batch, len(chat_ids), status, "Рассылка фото")
 
 
 @router.message(BroadcastStates.message)
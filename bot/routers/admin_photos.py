@@ -10,6 +10,7 @@ from aiogram.fsm.state import State, StatesGroup
 from database.database import async_session_maker
 from database.repositories import MenuRepository
 from bot.keyboards.admin_keyboards import get_photo_search_results_keyboard
+from bot.media import media_registry
 
 # Путь к папке с фото
 PHOTOS_DIR = Path(__file__).parent.parent.parent / "photos"
@@ -116,6 +117,8 @@ async def admin_photo_upload(message: Message, state: FSMContext, user=None):
     # Скачиваем фото
     file_path = PHOTOS_DIR / f"{item_id}.jpg"
     await message.bot.download_file(file.file_path, file_path)
+    # Фото уже загружено в Telegram — сразу запоминаем его file_id
+    await media_registry.register(file_path, file_id)
 
     # Сохраняем путь в базу данных
     async with async_session_maker() as session:
@@ -1,6 +1,6 @@
 """Прогресс обучения сотрудников (админ)"""
 
-from typing import Optional, List
+from typing import Dict, Optional, List
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
@@ -12,44 +12,40 @@ from bot.utils import get_role_name
 router = Router()
 
 
-async def calculate_user_stats(user_id: int, role: UserRole, branch: str) -> dict:
-    """Подсчитать статистику пользователя"""
+async def calculate_users_stats(users: List[User]) -> Dict[int, dict]:
+    """Подсчитать статистику сразу для списка пользователей (фиксированное число запросов)"""
+    user_ids = [u.id for u in users]
     async with async_session_maker() as session:
         training_repo = TrainingRepository(session)
         test_repo = TestRepository(session)
-        
+
+        material_totals = await training_repo.count_by_role_branch()
+        completed = await training_repo.count_completed_by_users(user_ids)
+        test_totals = await test_repo.count_active_by_role_branch()
+        best_results = await test_repo.get_best_results_by_users(user_ids)
+
+    stats = {}
+    for u in users:
         # Материалы
-        all_materials = await training_repo.get_materials_by_role(role, branch)
-        completed_materials = 0
-        for material in all_materials:
-            progress = await training_repo.get_progress(user_id, material.id)
-            if progress and progress.is_completed:
-                completed_materials += 1
-        
-        material_percent = int(completed_materials / len(all_materials) * 100) if all_materials else 0
-        
-        # Тесты
-        all_tests = await test_repo.get_tests_by_role(role, branch)
-        test_results = await test_repo.get_user_results(user_id)
-        
-        passed_tests = {}
-        for result in test_results:
-            test_id = result.test_id
-            if test_id not in passed_tests or result.percent > passed_tests[test_id].percent:
-                passed_tests[test_id] = result
-        
-        passed_count = sum(1 for r in passed_tests.values() if r.passed)
-        avg_test_percent = sum(r.percent for r in passed_tests.values()) / len(passed_tests) if passed_tests else 0
-        
-        return {
+        material_total = material_totals.get((u.role, u.branch), 0)
+        completed_materials = completed.get(u.id, 0)
+        material_percent = int(completed_materials / material_total * 100) if material_total else 0
+
+        # Тесты (лучший результат по каждому тесту)
+        results = best_results.get(u.id, [])
+        passed_count = sum(1 for _, passed in results if passed)
+        avg_test_percent = sum(percent for percent, _ in results) / len(results) if results else 0
+
+        stats[u.id] = {
             'material_completed': completed_materials,
-            'material_total': len(all_materials),
+            'material_total': material_total,
             'material_percent': material_percent,
             'test_passed': passed_count,
-            'test_total': len(all_tests),
+            'test_total': test_totals.get((u.role, u.branch), 0),
             'test_percent': int(avg_test_percent),
-            'has_tests': len(test_results) > 0,
+            'has_tests': len(results) > 0,
         }
+    return stats
 
 
 async def show_progress_list(
@@ -86,14 +82,12 @@ async def show_progress_list(
     else:
         filtered_users = active_users
     
-    # Подсчитываем статистику для каждого пользователя
-    users_with_stats = []
-    for emp in filtered_users:
-        stats = await calculate_user_stats(emp.id, emp.role, emp.branch)
-        users_with_stats.append({
-            'user': emp,
-            'stats': stats
-        })
+    # Статистика считается один раз для всех — и для списка, и для сводки по ролям
+    all_stats = await calculate_users_stats(active_users)
+    users_with_stats = [
+        {'user': emp, 'stats': all_stats[emp.id]}
+        for emp in filtered_users
+    ]
     
     # Сортировка
     if sort_by == "name":
@@ -119,7 +113,7 @@ async def show_progress_list(
         total_test = 0
         count = 0
         for emp in role_users:
-            stats = await calculate_user_stats(emp.id, emp.role, emp.branch)
+            stats = all_stats[emp.id]
             total_material += stats['material_percent']
             total_test += stats['test_percent']
             count += 1
@@ -304,12 +298,9 @@ async def show_user_progress(callback: CallbackQuery, user=None):
         # Получаем материалы для его роли
         all_materials = await training_repo.get_materials_by_role(employee.role, employee.branch)
         
-        # Получаем прогресс по материалам
-        completed_materials = 0
-        for material in all_materials:
-            progress = await training_repo.get_progress(employee.id, material.id)
-            if progress and progress.is_completed:
-                completed_materials += 1
+        # Получаем прогресс по материалам (одним запросом)
+        completed = await training_repo.count_completed_by_users([employee.id])
+        completed_materials = completed.get(employee.id, 0)
         
         # Получаем тесты для его роли
         all_tests = await test_repo.get_tests_by_role(employee.role, employee.branch)
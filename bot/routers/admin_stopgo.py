@@ -1,6 +1,5 @@
 """Управление стоп/go-листами (админ)"""
 
-import asyncio
 import logging
 
 from aiogram import Router, F
@@ -17,6 +16,7 @@ from bot.keyboards.admin_keyboards import (
     get_stopgo_action_keyboard,
     get_search_results_keyboard,
 )
+from bot.outbox import enqueue, watch_batch
 
 router = Router()
 
@@ -291,21 +291,17 @@ async def admin_list_broadcast(callback: CallbackQuery, user=None):
 
         tg_users = await user_repo.get_all_with_telegram()
 
-    sent = 0
-    for tg_user in tg_users:
-        try:
-            await callback.bot.send_message(
-                tg_user.telegram_id, text, parse_mode="HTML"
-            )
-            sent += 1
-            await asyncio.sleep(0.05)
-        except Exception as e:
-            logger.warning(f"Не удалось отправить {title} пользователю {tg_user.full_name}: {e}")
+    batch = f"{list_type}list:{callback.id}"
+    chat_ids = [u.telegram_id for u in tg_users]
+    await enqueue(chat_ids, key=batch, batch=batch, text=text)
 
-    await callback.message.edit_text(
-        f"📢 {title} разослан {sent} сотрудникам.",
+    await callback.message.edit_text(f"⏳ Рассылка: 0 из {len(chat_ids)}")
+    watch_batch(
+        batch,
+        len(chat_ids),
+        callback.message,
+        f"Рассылка: {title}",
         reply_markup=get_stopgo_action_keyboard(list_type),
-        parse_mode="HTML",
     )
 
 
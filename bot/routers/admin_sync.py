@@ -28,19 +28,23 @@ async def sync_menu(callback: CallbackQuery, user=None):
         "• Скачанные файлы обучения\n"
         "• Результаты тестов и прогресс\n"
         "• Привязки Telegram сотрудников\n\n"
+        "Разделы, которые не менялись с прошлой синхронизации, пропускаются. "
+        "«Принудительно» обновит все разделы (например, если файл по ссылке заменили).\n\n"
         "Нажмите кнопку для начала синхронизации:",
         reply_markup=get_sync_keyboard(),
         parse_mode="HTML",
     )
 
 
-@router.callback_query(F.data == "admin_sync:all")
+@router.callback_query(F.data.in_({"admin_sync:all", "admin_sync:force"}))
 async def sync_all(callback: CallbackQuery, user=None):
-    """Выполнить полную синхронизацию"""
+    """Выполнить полную синхронизацию (force — записать и неизменившиеся разделы)"""
     await callback.answer()
     if not user or user.role.value != "manager":
         return
 
+    force = callback.data == "admin_sync:force"
+
     await callback.message.edit_text(
         "🔄 <b>Синхронизация запущена...</b>\n\n"
         "⏳ Подключение к Google Sheets...\n"
@@ -50,7 +54,7 @@ async def sync_all(callback: CallbackQuery, user=None):
 
     try:
         sync = GoogleSheetsSync()
-        report = await sync.sync_all()
+        report = await sync.sync_all(force=force)
     except Exception as e:
         logger.error(f"Ошибка синхронизации: {e}")
         await callback.message.edit_text(
@@ -77,6 +81,8 @@ async def sync_all(callback: CallbackQuery, user=None):
     emp = details.get("employees", {})
     if "error" in emp:
         text += f"👥 Сотрудники: ❌ {emp['error']}\n"
+    elif emp.get("skipped"):
+        text += "👥 Сотрудники: без изменений (пропущено)\n"
     else:
         text += (
             f"👥 Сотрудники: "
@@ -89,6 +95,8 @@ async def sync_all(callback: CallbackQuery, user=None):
     menu = details.get("menu", {})
     if "error" in menu:
         text += f"🍽 Меню: ❌ {menu['error']}\n"
+    elif menu.get("skipped"):
+        text += "🍽 Меню: без изменений (пропущено)\n"
     else:
         parts = []
         if menu.get("created"):
@@ -106,6 +114,8 @@ async def sync_all(callback: CallbackQuery, user=None):
     training = details.get("training", {})
     if "error" in training:
         text += f"📚 Обучение: ❌ {training['error']}\n"
+    elif training.get("skipped"):
+        text += "📚 Обучение: без изменений (пропущено)\n"
     else:
         parts = []
         if training.get("created"):
@@ -117,7 +127,10 @@ async def sync_all(callback: CallbackQuery, user=None):
         if training.get("deleted"):
             parts.append(f"-{training['deleted']} удал.")
         if training.get("files_downloaded"):
-            parts.append(f"📎{training['files_downloaded']} файлов")
+            size_mb = training.get("bytes_downloaded", 0) / 1024 / 1024
+            parts.append(f"📎{training['files_downloaded']} файлов, {size_mb:.1f} МБ")
+        if training.get("files_unchanged"):
+            parts.append(f"📎{training['files_unchanged']} файлов без изм.")
         total = training.get("created", 0) + training.get("updated", 0) + training.get("unchanged", 0)
         text += f"📚 Обучение ({total}): {', '.join(parts) if parts else 'нет данных'}\n"
 
@@ -125,16 +138,28 @@ async def sync_all(callback: CallbackQuery, user=None):
     tests = details.get("tests", {})
     if "error" in tests:
         text += f"📝 Тесты: ❌ {tests['error']}\n"
+    elif tests.get("skipped"):
+        text += "📝 Тесты: без изменений (пропущено)\n"
     else:
+        parts = []
+        if tests.get("created"):
+            parts.append(f"+{tests['created']} нов.")
+        if tests.get("updated"):
+            parts.append(f"⟳{tests['updated']} обн.")
+        if tests.get("deleted"):
+            parts.append(f"-{tests['deleted']} удал.")
         text += (
             f"📝 Тесты: {tests.get('tests', 0)} тестов, "
-            f"{tests.get('questions', 0)} вопросов\n"
+            f"{tests.get('questions', 0)} вопросов"
+            f"{' (' + ', '.join(parts) + ')' if parts else ''}\n"
         )
 
     # Чек-листы
     checklists = details.get("checklists", {})
     if "error" in checklists:
         text += f"📋 Чек-листы: ❌ {checklists['error']}\n"
+    elif checklists.get("skipped"):
+        text += "📋 Чек-листы: без изменений (пропущено)\n"
     else:
         text += f"📋 Чек-листы: загружено {checklists.get('count', 0)} задач\n"
 
@@ -142,9 +167,24 @@ async def sync_all(callback: CallbackQuery, user=None):
     motivation = details.get("motivation", {})
     if "error" in motivation:
         text += f"💪 Мотивация: ❌ {motivation['error']}\n"
+    elif motivation.get("skipped"):
+        text += "💪 Мотивация: без изменений (пропущено)\n"
     else:
         text += f"💪 Мотивация: {motivation.get('count', 0)} сообщений\n"
 
+    # Время по разделам: чтение таблицы + запись в БД
+    timings = report.get("timings", {})
+    if "total" in timings:
+        slowest = max(
+            (name for name in details if isinstance(timings.get(name), dict)),
+            key=lambda name: sum(timings[name].values()),
+            default=None,
+        )
+        text += f"\n⏱ {timings['total']:.1f} с"
+        if slowest:
+            text += f" (дольше всего: {slowest}, {sum(timings[slowest].values()):.1f} с)"
+        text += "\n"
+
     await callback.message.edit_text(
         text,
         reply_markup=get_sync_keyboard(),
@@ -0,0 +1,93 @@
+"""Inline-поиск по меню: @бот <запрос> в любом чате"""
+
+from typing import List
+
+from aiogram import Router
+from aiogram.types import (
+    InlineQuery,
+    InlineQueryResultArticle,
+    InlineQueryResultsButton,
+    InputTextMessageContent,
+)
+
+from config import settings
+from database.cache import MISSING, menu_query_cache
+from database.database import async_session_maker
+from database.menu_catalog import menu_catalog
+from database.repositories import MenuRepository
+from database.models import MenuItemStatus
+from bot.routers.menu import format_item_card, format_kbzhu
+
+router = Router()
+
+# Сколько позиций показывать в выдаче
+MAX_RESULTS = 20
+
+STATUS_ICONS = {
+    MenuItemStatus.STOP: "🚫 СТОП",
+    MenuItemStatus.GO: "🔥 GO",
+}
+
+
+def build_results(items) -> List[InlineQueryResultArticle]:
+    """Карточки позиций меню для inline-выдачи"""
+    results = []
+    for item in items:
+        title = item.name
+        status = STATUS_ICONS.get(item.status)
+        if status:
+            title = f"{status} · {title}"
+
+        details = []
+        if item.price:
+            details.append(f"{item.price:.0f} ₽")
+        kbzhu = format_kbzhu(item)
+        if kbzhu:
+            details.append(kbzhu)
+        if item.weight_volume:
+            details.append(item.weight_volume)
+
+        results.append(InlineQueryResultArticle(
+            id=str(item.id),
+            title=title,
+            description=" · ".join(details) or item.category,
+            input_message_content=InputTextMessageContent(
+                message_text=format_item_card(item),
+                parse_mode="HTML",
+            ),
+        ))
+    return results
+
+
+@router.inline_query()
+async def inline_menu_search(inline_query: InlineQuery, user=None):
+    """Поиск блюд и напитков по меню филиала сотрудника"""
+    if not user or not user.is_active:
+        await inline_query.answer(
+            [],
+            cache_time=5,
+            is_personal=True,
+            button=InlineQueryResultsButton(text="Авторизуйтесь в боте", start_parameter="inline"),
+        )
+        return
+
+    query = " ".join(inline_query.query.lower().split())
+    # Версия каталога в ключе: после изменения меню старые выдачи не используются
+    cache_key = (user.branch, menu_catalog.version, query)
+
+    results = menu_query_cache.get(cache_key, MISSING)
+    if results is MISSING:
+        # Выдача, посчитанная до изменения меню, в кэш не попадёт
+        generation = menu_query_cache.generation
+        async with async_session_maker() as session:
+            menu_repo = MenuRepository(session)
+            if query:
+                items = await menu_repo.search_by_name(query, user.branch, limit=MAX_RESULTS)
+            else:
+                # Пустой запрос — приоритетные позиции
+                items = (await menu_repo.get_go_list(user.branch))[:MAX_RESULTS]
+        results = build_results(items)
+        menu_query_cache.set(cache_key, results, generation=generation)
+
+    # Выдача зависит от филиала, поэтому кэш Telegram — персональный
+    await inline_query.answer(results, cache_time=settings.INLINE_CACHE_TIME, is_personal=True)
@@ -1,12 +1,13 @@
 from pathlib import Path
 
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, Message, FSInputFile
+from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from database.database import async_session_maker
 from database.repositories import MenuRepository
+from database.menu_catalog import menu_catalog
 from database.models import MenuType
 from bot.keyboards import (
     get_menu_type_keyboard,
@@ -18,6 +19,7 @@ from bot.keyboards.keyboards import (
     get_item_back_keyboard,
 )
 from bot.utils import safe_edit_or_send
+from bot.media import media_registry
 
 router = Router()
 
@@ -43,9 +45,7 @@ async def select_menu_type(callback: CallbackQuery, user=None):
     emoji = "🍳" if menu_type == "kitchen" else "🍹"
     label = "Меню кухни" if menu_type == "kitchen" else "Меню бара"
 
-    async with async_session_maker() as session:
-        menu_repo = MenuRepository(session)
-        categories = await menu_repo.get_categories(menu_type_enum, user.branch)
+    categories = (await menu_catalog.get(user.branch)).categories(menu_type_enum)
 
     if not categories:
         await safe_edit_or_send(
@@ -87,9 +87,7 @@ async def back_to_categories(callback: CallbackQuery, user=None):
     emoji = "🍳" if menu_type == "kitchen" else "🍹"
     label = "Меню кухни" if menu_type == "kitchen" else "Меню бара"
 
-    async with async_session_maker() as session:
-        menu_repo = MenuRepository(session)
-        categories = await menu_repo.get_categories(menu_type_enum, user.branch)
+    categories = (await menu_catalog.get(user.branch)).categories(menu_type_enum)
 
     await safe_edit_or_send(
         callback,
@@ -112,13 +110,11 @@ async def select_category(callback: CallbackQuery, user=None):
     
     menu_type_enum = MenuType.KITCHEN if menu_type == "kitchen" else MenuType.BAR
     
-    async with async_session_maker() as session:
-        menu_repo = MenuRepository(session)
-        items = await menu_repo.get_items_by_category(category, menu_type_enum, user.branch)
-        if not items:
-            categories = await menu_repo.get_categories(menu_type_enum, user.branch)
+    branch_menu = await menu_catalog.get(user.branch)
+    items = branch_menu.items(category, menu_type_enum)
     
     if not items:
+        categories = branch_menu.categories(menu_type_enum)
         await safe_edit_or_send(
             callback,
             f"В категории «{category}» пока нет доступных позиций.",
@@ -133,29 +129,22 @@ async def select_category(callback: CallbackQuery, user=None):
     )
 
 
-@router.callback_query(F.data.startswith("item:"))
-async def show_item(callback: CallbackQuery, user=None):
-    """Показать карточку позиции меню"""
-    await callback.answer()
-    
-    if not user:
-        return
-    
-    item_id = int(callback.data.split(":")[1])
-    
-    async with async_session_maker() as session:
-        menu_repo = MenuRepository(session)
-        item = await menu_repo.get_by_id(item_id)
-    
-    if not item:
-        await safe_edit_or_send(
-            callback,
-            "Позиция не найдена.",
-            reply_markup=get_back_keyboard("menu_back_to_types"),
-        )
-        return
-    
-    # Формируем карточку
+def format_kbzhu(item) -> str:
+    """КБЖУ позиции одной строкой (пусто, если не заполнено)"""
+    kbzhu_parts = []
+    if item.calories:
+        kbzhu_parts.append(f"{item.calories} ккал")
+    if item.proteins:
+        kbzhu_parts.append(f"Б {item.proteins:.1f}")
+    if item.fats:
+        kbzhu_parts.append(f"Ж {item.fats:.1f}")
+    if item.carbs:
+        kbzhu_parts.append(f"У {item.carbs:.1f}")
+    return " / ".join(kbzhu_parts)
+
+
+def format_item_card(item) -> str:
+    """Текст карточки позиции меню"""
     status_label = ""
     if item.status.value == "go":
         status_label = "🔥 ПРИОРИТЕТНАЯ ПОЗИЦИЯ\n\n"
@@ -172,20 +161,41 @@ async def show_item(callback: CallbackQuery, user=None):
         card_text += f"⚖️ <b>Объём/вес:</b> {item.weight_volume}\n"
     
     # КБЖУ
-    kbzhu_parts = []
-    if item.calories:
-        kbzhu_parts.append(f"{item.calories} ккал")
-    if item.proteins:
-        kbzhu_parts.append(f"Б {item.proteins:.1f}")
-    if item.fats:
-        kbzhu_parts.append(f"Ж {item.fats:.1f}")
-    if item.carbs:
-        kbzhu_parts.append(f"У {item.carbs:.1f}")
-    if kbzhu_parts:
-        card_text += f"📊 <b>КБЖУ:</b> {' / '.join(kbzhu_parts)}\n"
+    kbzhu = format_kbzhu(item)
+    if kbzhu:
+        card_text += f"📊 <b>КБЖУ:</b> {kbzhu}\n"
 
     if item.price:
         card_text += f"\n💰 <b>Цена:</b> {item.price:.0f} ₽"
+
+    return card_text
+
+
+@router.callback_query(F.data.startswith("item:"))
+async def show_item(callback: CallbackQuery, user=None):
+    """Показать карточку позиции меню"""
+    await callback.answer()
+    
+    if not user:
+        return
+    
+    item_id = int(callback.data.split(":")[1])
+    
+    item = (await menu_catalog.get(user.branch)).item(item_id)
+    if not item:
+        # Позиция другого филиала или добавлена после сборки снимка
+        async with async_session_maker() as session:
+            item = await MenuRepository(session).get_by_id(item_id)
+    
+    if not item:
+        await safe_edit_or_send(
+            callback,
+            "Позиция не найдена.",
+            reply_markup=get_back_keyboard("menu_back_to_types"),
+        )
+        return
+    
+    card_text = format_item_card(item)
     
     menu_type = "kitchen" if item.menu_type == MenuType.KITCHEN else "bar"
     is_manager = user and user.role.value == "manager"
@@ -200,8 +210,9 @@ async def show_item(callback: CallbackQuery, user=None):
                 await callback.message.delete()
             except TelegramBadRequest:
                 pass
-            await callback.message.answer_photo(
-                photo=FSInputFile(photo_path),
+            await media_registry.send_photo(
+                callback.message,
+                photo_path,
                 caption=card_text,
                 reply_markup=kb,
                 parse_mode="HTML"
@@ -270,6 +281,8 @@ async def menu_upload_photo_receive(message: Message, state: FSMContext, user=No
     # Скачиваем фото
     file_path = PHOTOS_DIR / f"{item_id}.jpg"
     await message.bot.download_file(file.file_path, file_path)
+    # Фото уже загружено в Telegram — сразу запоминаем его file_id
+    await media_registry.register(file_path, file_id)
 
     # Сохраняем путь в базу данных
     async with async_session_maker() as session:
@@ -1,18 +1,22 @@
+import logging
 from pathlib import Path
 
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from database.database import async_session_maker
 from database.repositories import UserRepository
-import asyncio
 
 from bot.keyboards.admin_keyboards import get_main_menu_keyboard
 from bot.utils import get_role_name, are_tests_active
-from integrations.google_sheets import GoogleSheetsSync
+from bot.media import media_registry
+from bot.outbox import enqueue
+from integrations.roster import employee_roster
+
+logger = logging.getLogger(__name__)
 
 # Путь к логотипу
 LOGO_PATH = Path(__file__).parent.parent / "assets" / "logo.png"
@@ -25,6 +29,22 @@ class BindPhoneStates(StatesGroup):
     waiting_for_phone = State()
 
 
+async def notify_managers_about_binding(user_repo: UserRepository, employee, telegram_id: int):
+    """Поставить в очередь уведомление менеджерам о привязке Telegram сотрудником"""
+    try:
+        managers = await user_repo.get_all_with_telegram()
+        await enqueue(
+            [mgr.telegram_id for mgr in managers if mgr.role.value == "manager" and mgr.id != employee.id],
+            key=f"bind:{employee.id}:{telegram_id}",
+            text=(
+                f"ℹ️ Сотрудник <b>{employee.full_name}</b> "
+                f"({get_role_name(employee.role)}) привязал Telegram."
+            ),
+        )
+    except Exception as e:
+        logger.warning(f"Не удалось поставить уведомление менеджерам: {e}")
+
+
 async def _send_welcome(message: Message, user_obj, greeting: str, tests_on: bool):
     """Отправить приветственное сообщение с данными пользователя (одним сообщением)"""
     caption = (
@@ -37,8 +57,9 @@ async def _send_welcome(message: Message, user_obj, greeting: str, tests_on: boo
         caption += "\n\n🔑 Панель управления: /admin"
 
     if LOGO_PATH.exists():
-        await message.answer_photo(
-            photo=FSInputFile(LOGO_PATH),
+        await media_registry.send_photo(
+            message,
+            LOGO_PATH,
             caption=caption,
             reply_markup=get_main_menu_keyboard(tests_on),
         )
@@ -82,21 +103,7 @@ async def cmd_start(message: Message, state: FSMContext, user=None):
                 await state.clear()
 
                 # Уведомляем менеджеров
-                try:
-                    managers = await user_repo.get_all_with_telegram()
-                    for mgr in managers:
-                        if mgr.role.value == "manager" and mgr.id != found_user.id:
-                            try:
-                                await message.bot.send_message(
-                                    mgr.telegram_id,
-                                    f"ℹ️ Сотрудник <b>{found_user.full_name}</b> "
-                                    f"({get_role_name(found_user.role)}) привязал Telegram.",
-                                    parse_mode="HTML",
-                                )
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
+                await notify_managers_about_binding(user_repo, found_user, message.from_user.id)
                 return
 
     # Если автопривязка не сработала — запрашиваем телефон или username
@@ -111,8 +118,9 @@ async def cmd_start(message: Message, state: FSMContext, user=None):
         "• @ваш_username"
     )
     if LOGO_PATH.exists():
-        await message.answer_photo(
-            photo=FSInputFile(LOGO_PATH),
+        await media_registry.send_photo(
+            message,
+            LOGO_PATH,
             caption=f"<b>Добро пожаловать в Бистро ГАВРОШ!</b>\n\n{auth_prompt}",
         )
     else:
@@ -155,18 +163,14 @@ async def process_phone(message: Message, state: FSMContext):
                         return
                 if not user:
                     # Проверяем таблицу «Доступ»
-                    sync = GoogleSheetsSync()
-                    if await asyncio.to_thread(sync.connect):
-                        employees = await asyncio.to_thread(sync.read_employees)
-                        for emp in employees:
-                            if emp.get("telegram_username") == normalized_username and emp.get("is_active", True):
-                                user = await user_repo.create(
-                                    full_name=emp["full_name"],
-                                    role=emp["role"],
-                                    branch=emp["branch"],
-                                    telegram_username=normalized_username,
-                                )
-                                break
+                    emp = await employee_roster.find_by_username(normalized_username)
+                    if emp:
+                        user = await user_repo.create(
+                            full_name=emp["full_name"],
+                            role=emp["role"],
+                            branch=emp["branch"],
+                            telegram_username=normalized_username,
+                        )
 
                 if user:
                     await user_repo.bind_telegram(user.id, telegram_id)
@@ -179,21 +183,7 @@ async def process_phone(message: Message, state: FSMContext):
                     )
                     await state.clear()
                     # Уведомляем менеджеров
-                    try:
-                        managers = await user_repo.get_all_with_telegram()
-                        for mgr in managers:
-                            if mgr.role.value == "manager" and mgr.id != user.id:
-                                try:
-                                    await message.bot.send_message(
-                                        mgr.telegram_id,
-                                        f"ℹ️ Сотрудник <b>{user.full_name}</b> "
-                                        f"({get_role_name(user.role)}) привязал Telegram.",
-                                        parse_mode="HTML",
-                                    )
-                                except Exception:
-                                    pass
-                    except Exception:
-                        pass
+                    await notify_managers_about_binding(user_repo, user, message.from_user.id)
                     return
                 else:
                     await message.answer(
@@ -211,8 +201,7 @@ async def process_phone(message: Message, state: FSMContext):
 
         if user:
             # Таблица «Доступ» — источник правды: обновляем БД из таблицы
-            sync = GoogleSheetsSync()
-            employee = await asyncio.to_thread(sync.find_employee_by_phone, phone)
+            employee = await employee_roster.find_by_phone(phone)
             if employee:
                 await user_repo.update(
                     user.id,
@@ -241,22 +230,8 @@ async def process_phone(message: Message, state: FSMContext):
             )
             await state.clear()
 
-            # Уведомляем менеджеров о новом сотруднике
-            try:
-                managers = await user_repo.get_all_with_telegram()
-                for mgr in managers:
-                    if mgr.role.value == "manager" and mgr.id != user.id:
-                        try:
-                            await message.bot.send_message(
-                                mgr.telegram_id,
-                                f"ℹ️ Сотрудник <b>{user.full_name}</b> "
-                                f"({get_role_name(user.role)}) привязал Telegram.",
-                                parse_mode="HTML",
-                            )
-                        except Exception:
-                            pass
-            except Exception:
-                pass
+            # Уведомляем менеджеров
+            await notify_managers_about_binding(user_repo, user, message.from_user.id)
         else:
             existing_user = await user_repo.get_by_phone_any(phone)
             if existing_user and existing_user.telegram_id:
@@ -267,8 +242,7 @@ async def process_phone(message: Message, state: FSMContext):
                 )
             else:
                 # Проверяем таблицу "Доступ" — может сотрудник только что добавлен
-                sync = GoogleSheetsSync()
-                employee = await asyncio.to_thread(sync.find_employee_by_phone, phone)
+                employee = await employee_roster.find_by_phone(phone)
                 if employee:
                     new_user = await user_repo.create(
                         full_name=employee["full_name"],
@@ -286,21 +260,8 @@ async def process_phone(message: Message, state: FSMContext):
                         tests_on,
                     )
                     await state.clear()
-                    try:
-                        managers = await user_repo.get_all_with_telegram()
-                        for mgr in managers:
-                            if mgr.role.value == "manager" and mgr.id != new_user.id:
-                                try:
-                                    await message.bot.send_message(
-                                        mgr.telegram_id,
-                                        f"ℹ️ Сотрудник <b>{new_user.full_name}</b> "
-                                        f"({get_role_name(new_user.role)}) привязал Telegram.",
-                                        parse_mode="HTML",
-                                    )
-                                except Exception:
-                                    pass
-                    except Exception:
-                        pass
+                    # Уведомляем менеджеров
+                    await notify_managers_about_binding(user_repo, new_user, message.from_user.id)
                 else:
                     await message.answer(
                         "🤔 К сожалению, мы не нашли этот номер в системе.\n\n"
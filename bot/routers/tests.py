@@ -1,20 +1,24 @@
 import asyncio
-from typing import Dict, List, Any
+import logging
+from datetime import datetime, timedelta
 
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
+from config import settings
 from database.database import async_session_maker
-from database.repositories import TestRepository
-from database.models import Question
+from database.repositories import TestRepository, TestSessionRepository, TestSession
+from bot.deadlines import DeadlineScheduler
 from bot.keyboards import (
     get_tests_keyboard,
     get_test_answers_keyboard,
     get_back_keyboard,
 )
 
+logger = logging.getLogger(__name__)
+
 router = Router()
 
 
@@ -23,8 +27,12 @@ class TestStates(StatesGroup):
     in_progress = State()
 
 
-# Хранение активных тестов и таймеров
-active_tests: Dict[int, Dict[str, Any]] = {}
+# Таймеры текущих вопросов в этом процессе: telegram_id -> question_id.
+# Само прохождение хранится в таблице test_sessions.
+question_timers = DeadlineScheduler("test_questions")
+
+# Через сколько секунд после срока вопрос с потерянным таймером закрывает уборка
+TIMEOUT_GRACE_SECONDS = 10
 
 
 async def show_tests(message: Message, user):
@@ -91,20 +99,18 @@ async def start_test(callback: CallbackQuery, state: FSMContext, user=None):
     # Сортируем вопросы по порядку
     questions = sorted(test.questions, key=lambda q: q.order_num)
     
-    # Инициализируем тест
-    user_id = callback.from_user.id
-    active_tests[user_id] = {
-        "test_id": test_id,
-        "test": test,
-        "questions": questions,
-        "current_index": 0,
-        "correct_answers": 0,
-        "total_questions": len(questions),
-        "answers": [],
-        "message": callback.message,
-        "time_per_question": test.time_per_question,
-        "timer_task": None,
-    }
+    # Инициализируем прохождение (хранится в БД, а не в памяти процесса)
+    test_session = TestSession(
+        telegram_id=callback.from_user.id,
+        test_id=test_id,
+        question_ids=[q.id for q in questions],
+        time_limit=test.time_per_question,
+        chat_id=callback.message.chat.id,
+        message_id=callback.message.message_id,
+    )
+    _cancel_timer(test_session.telegram_id)
+    async with async_session_maker() as session:
+        await TestSessionRepository(session).start(test_session)
     
     await state.set_state(TestStates.in_progress)
     
@@ -120,103 +126,113 @@ async def start_test(callback: CallbackQuery, state: FSMContext, user=None):
     )
     
     await asyncio.sleep(2)
-    await show_question(callback.message.bot, user_id)
+    await show_question(callback.message.bot, test_session)
 
 
-async def show_question(bot: Bot, user_id: int):
+async def _edit(bot: Bot, test_session: TestSession, text: str, reply_markup=None):
+    """Отредактировать сообщение теста (ошибки Telegram игнорируются)"""
+    try:
+        await bot.edit_message_text(
+            text,
+            chat_id=test_session.chat_id,
+            message_id=test_session.message_id,
+            reply_markup=reply_markup,
+            parse_mode="HTML"
+        )
+    except Exception:
+        pass
+
+
+async def show_question(bot: Bot, test_session: TestSession):
     """Показать текущий вопрос"""
-    if user_id not in active_tests:
-        return
+    _cancel_timer(test_session.telegram_id)
     
-    test_data = active_tests[user_id]
-    
-    # Отменяем предыдущий таймер если есть
-    if test_data.get("timer_task"):
-        test_data["timer_task"].cancel()
-    
-    current_index = test_data["current_index"]
-    questions = test_data["questions"]
-    
-    if current_index >= len(questions):
+    async with async_session_maker() as session:
+        test_repo = TestRepository(session)
+        session_repo = TestSessionRepository(session)
+        
+        # Пропускаем вопросы, удалённые синхронизацией во время прохождения
+        question = None
+        while not test_session.finished:
+            question = await test_repo.get_question_with_answers(test_session.current_question_id)
+            if question:
+                break
+            if not await session_repo.advance(test_session, correct=False):
+                return
+    
+    # Запросы к Telegram — вне сессии, чтобы не держать соединение с БД
+    if test_session.finished:
         # Тест завершён
-        await finish_test(bot, user_id)
+        await finish_test(bot, test_session)
         return
     
-    question = questions[current_index]
-    time_limit = test_data["time_per_question"]
+    time_limit = test_session.time_limit
     
     # Формируем текст вопроса
     text = (
-        f"❓ <b>Вопрос {current_index + 1} из {len(questions)}</b>\n\n"
+        f"❓ <b>Вопрос {test_session.current_index + 1} из {test_session.total}</b>\n\n"
         f"{question.text}\n\n"
         f"⏱ Время: {time_limit} секунд"
     )
     
-    try:
-        await test_data["message"].edit_text(
-            text,
-            reply_markup=get_test_answers_keyboard(question.answers, question.id),
-            parse_mode="HTML"
-        )
-    except Exception:
-        pass
+    await _edit(bot, test_session, text, get_test_answers_keyboard(question.answers, question.id))
+    
+    deadline = datetime.utcnow() + timedelta(seconds=time_limit)
+    async with async_session_maker() as session:
+        await TestSessionRepository(session).set_deadline(test_session, deadline)
     
     # Запускаем таймер
-    test_data["timer_task"] = asyncio.create_task(
-        question_timeout(bot, user_id, question.id)
-    )
+    question_timers.schedule(test_session.telegram_id, time_limit, question.id)
 
 
-async def question_timeout(bot: Bot, user_id: int, question_id: int):
-    """Таймаут вопроса"""
-    try:
-        if user_id not in active_tests:
-            return
-        
-        test_data = active_tests[user_id]
-        time_limit = test_data["time_per_question"]
-        
-        await asyncio.sleep(time_limit)
-    except asyncio.CancelledError:
-        # Таймер отменён — пользователь успел ответить
-        return
-    
-    # Проверяем, что вопрос ещё актуален
-    if user_id not in active_tests:
-        return
-    
-    current_index = test_data["current_index"]
-    questions = test_data["questions"]
-    
-    if current_index >= len(questions):
-        return
-    
-    current_question = questions[current_index]
-    if current_question.id != question_id:
-        return
+def _cancel_timer(telegram_id: int):
+    """Отменить таймер текущего вопроса в этом процессе"""
+    question_timers.cancel(telegram_id)
+
+
+async def start_question_timers(bot: Bot):
+    """Запустить таймеры вопросов и восстановить их для прерванных прохождений"""
+    async def expire_batch(expired):
+        await asyncio.gather(
+            *(expire_question(bot, telegram_id, question_id) for telegram_id, question_id in expired),
+            return_exceptions=True,
+        )
     
-    # Время вышло - записываем как неотвеченный
-    test_data["answers"].append({
-        "question_id": question_id,
-        "answer_id": None,
-        "is_correct": False,
-        "timeout": True
-    })
+    question_timers.start(expire_batch)
     
-    # Переходим к следующему вопросу
-    test_data["current_index"] += 1
+    async with async_session_maker() as session:
+        pending = await TestSessionRepository(session).get_pending()
+    now = datetime.utcnow()
+    for test_session in pending:
+        delay = (test_session.deadline - now).total_seconds()
+        question_timers.schedule(test_session.telegram_id, delay, test_session.current_question_id)
+    if pending:
+        logger.info(f"Восстановлены таймеры незавершённых тестов: {len(pending)}")
+
+
+async def expire_question(bot: Bot, telegram_id: int, question_id: int):
+    """Время на вопрос вышло — засчитываем его как неотвеченный"""
+    async with async_session_maker() as session:
+        session_repo = TestSessionRepository(session)
+        test_session = await session_repo.get(telegram_id)
+        
+        # Проверяем, что вопрос ещё актуален
+        if not test_session or test_session.current_question_id != question_id:
+            return
+        
+        # Переходим к следующему вопросу
+        if not await session_repo.advance(test_session, correct=False):
+            return
     
-    try:
-        await test_data["message"].edit_text(
-            f"⏱ <b>Время вышло!</b>\n\n"
-            f"Переходим к следующему вопросу...",
-            parse_mode="HTML"
-        )
-        await asyncio.sleep(1.5)
-    except Exception:
-        pass
+    await _edit(
+        bot,
+        test_session,
+        f"⏱ <b>Время вышло!</b>\n\n"
+        f"Переходим к следующему вопросу..."
+    )
+    await asyncio.sleep(1.5)
     
-    await show_question(bot, user_id)
+    await show_question(bot, test_session)
 
 
 @router.callback_query(F.data.startswith("answer:"), TestStates.in_progress)
@@ -224,94 +240,89 @@ async def process_answer(callback: CallbackQuery, state: FSMContext, user=None):
     """Обработка ответа на вопрос"""
     await callback.answer()
     
-    user_id = callback.from_user.id
-    
-    if user_id not in active_tests:
-        await callback.message.edit_text(
-            "Тест не найден. Пожалуйста, начните заново.",
-            reply_markup=get_back_keyboard("tests_back_to_list")
-        )
-        await state.clear()
-        return
-    
-    test_data = active_tests[user_id]
-    
-    # Отменяем таймер
-    if test_data.get("timer_task"):
-        test_data["timer_task"].cancel()
+    telegram_id = callback.from_user.id
+    bot = callback.message.bot
     
     parts = callback.data.split(":")
     question_id = int(parts[1])
     answer_id = int(parts[2])
     
-    current_index = test_data["current_index"]
-    questions = test_data["questions"]
-    
-    if current_index >= len(questions):
-        return
+    async with async_session_maker() as session:
+        session_repo = TestSessionRepository(session)
+        test_session = await session_repo.get(telegram_id)
+        
+        if not test_session:
+            await callback.message.edit_text(
+                "Тест не найден. Пожалуйста, начните заново.",
+                reply_markup=get_back_keyboard("tests_back_to_list")
+            )
+            await state.clear()
+            return
+        
+        # Проверяем, что отвечаем на текущий вопрос
+        if test_session.current_question_id != question_id:
+            return
+        
+        # Ответ после истечения времени засчитывается как таймаут
+        if test_session.deadline and test_session.deadline < datetime.utcnow():
+            expired = True
+        else:
+            expired = False
+            question = await TestRepository(session).get_question_with_answers(question_id)
+            
+            # Проверяем правильность ответа
+            is_correct = False
+            for answer in question.answers if question else []:
+                if answer.id == answer_id and answer.is_correct:
+                    is_correct = True
+                    break
+            
+            # Переходим к следующему вопросу
+            if not await session_repo.advance(test_session, correct=is_correct):
+                return
     
-    current_question = questions[current_index]
+    # Отменяем таймер
+    _cancel_timer(telegram_id)
     
-    # Проверяем, что отвечаем на текущий вопрос
-    if current_question.id != question_id:
+    if expired:
+        await expire_question(bot, telegram_id, question_id)
         return
     
-    # Проверяем правильность ответа
-    is_correct = False
-    for answer in current_question.answers:
-        if answer.id == answer_id and answer.is_correct:
-            is_correct = True
-            break
-    
-    if is_correct:
-        test_data["correct_answers"] += 1
-    
-    test_data["answers"].append({
-        "question_id": question_id,
-        "answer_id": answer_id,
-        "is_correct": is_correct,
-        "timeout": False
-    })
-    
-    # Переходим к следующему вопросу
-    test_data["current_index"] += 1
-    
     # Краткая обратная связь
     feedback = "✅ Верно!" if is_correct else "❌ Неверно"
     
-    try:
-        await callback.message.edit_text(
-            f"{feedback}\n\nСледующий вопрос...",
-            parse_mode="HTML"
-        )
-        await asyncio.sleep(1)
-    except Exception:
-        pass
+    await _edit(bot, test_session, f"{feedback}\n\nСледующий вопрос...")
+    await asyncio.sleep(1)
     
-    await show_question(callback.message.bot, user_id)
+    await show_question(bot, test_session)
 
 
-async def finish_test(bot: Bot, user_id: int):
+async def finish_test(bot: Bot, test_session: TestSession):
     """Завершение теста и подсчёт результатов"""
-    if user_id not in active_tests:
-        return
-    
-    test_data = active_tests[user_id]
-    
-    correct = test_data["correct_answers"]
-    total = test_data["total_questions"]
+    correct = test_session.score
+    total = test_session.total
     percent = (correct / total * 100) if total > 0 else 0
-    test = test_data["test"]
-    passed = percent >= test.passing_score
     
     # Сохраняем результат
     async with async_session_maker() as session:
         test_repo = TestRepository(session)
+        await TestSessionRepository(session).delete(test_session.telegram_id)
+        
+        test = await test_repo.get_test_by_id(test_session.test_id)
+        if not test:
+            await _edit(
+                bot,
+                test_session,
+                "Тест был удалён во время прохождения.",
+                get_back_keyboard("tests_back_to_list")
+            )
+            return
+        passed = percent >= test.passing_score
         
         # Получаем user из БД
         from database.repositories import UserRepository
         user_repo = UserRepository(session)
-        user = await user_repo.get_by_telegram_id(user_id)
+        user = await user_repo.get_by_telegram_id(test_session.telegram_id)
         
         if user:
             await test_repo.save_result(
@@ -343,17 +354,32 @@ async def finish_test(bot: Bot, user_id: int):
             "Рекомендуем повторить обучающие материалы и попробовать снова."
         )
     
+    await _edit(bot, test_session, result_text, get_back_keyboard("tests_back_to_list"))
+
+
+async def sweep_test_sessions(bot: Bot):
+    """
+    Фоновая уборка прохождений: истёкшие вопросы, чей таймер потерян
+    (перезапуск или другой процесс), засчитываются как неотвеченные,
+    брошенные прохождения удаляются.
+    """
+    now = datetime.utcnow()
     try:
-        await test_data["message"].edit_text(
-            result_text,
-            reply_markup=get_back_keyboard("tests_back_to_list"),
-            parse_mode="HTML"
-        )
-    except Exception:
-        pass
-    
-    # Очищаем данные теста
-    del active_tests[user_id]
+        async with async_session_maker() as session:
+            session_repo = TestSessionRepository(session)
+            overdue = await session_repo.get_overdue(now - timedelta(seconds=TIMEOUT_GRACE_SECONDS))
+            removed = await session_repo.delete_idle(
+                now - timedelta(seconds=settings.TEST_SESSION_IDLE_TTL)
+            )
+        if removed:
+            logger.info(f"Удалено брошенных прохождений тестов: {removed}")
+        # Истёкшие вопросы без таймера в этом процессе закрываем через общий планировщик
+        for test_session in overdue:
+            if test_session.telegram_id not in question_timers:
+                question_timers.schedule(test_session.telegram_id, 0, test_session.current_question_id)
+        logger.debug(f"Таймеры вопросов: {question_timers.stats()}")
+    except Exception as e:
+        logger.error(f"Ошибка уборки прохождений тестов: {e}")
 
 
 @router.callback_query(F.data == "tests_back_to_list")
@@ -363,11 +389,10 @@ async def back_to_tests_list(callback: CallbackQuery, state: FSMContext, user=No
     await state.clear()
     
     # Очищаем активный тест если есть
-    user_id = callback.from_user.id
-    if user_id in active_tests:
-        if active_tests[user_id].get("timer_task"):
-            active_tests[user_id]["timer_task"].cancel()
-        del active_tests[user_id]
+    telegram_id = callback.from_user.id
+    _cancel_timer(telegram_id)
+    async with async_session_maker() as session:
+        await TestSessionRepository(session).delete(telegram_id)
     
     if not user:
         await callback.message.edit_text(
@@ -1,6 +1,6 @@
 from pathlib import Path
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery
 
 from database.database import async_session_maker
 from database.repositories import TrainingRepository
@@ -9,6 +9,7 @@ from bot.keyboards import (
     get_mark_completed_keyboard,
     get_back_keyboard,
 )
+from bot.media import media_registry
 
 router = Router()
 
@@ -80,8 +81,9 @@ async def show_material(callback: CallbackQuery, user=None):
         # Проверяем, это file_id или путь к файлу
         if file_path.exists():
             # Локальный файл - отправляем
-            await callback.message.answer_document(
-                document=FSInputFile(file_path),
+            await media_registry.send_document(
+                callback.message,
+                file_path,
                 caption=text,
                 reply_markup=get_mark_completed_keyboard(material_id),
                 parse_mode="HTML"
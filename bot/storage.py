@@ -0,0 +1,144 @@
+"""Персистентное хранилище состояний FSM"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import and_, case, delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import settings
+from database.database import engine, dialect_insert
+from database.models import FSMRecord
+
+logger = logging.getLogger(__name__)
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+
+class DatabaseStorage(BaseStorage):
+    """
+    Хранилище FSM в таблице fsm_states через общий async-движок.
+
+    Состояние переживает перезапуск бота и доступно всем процессам,
+    работающим с одной БД. Записи старше ttl считаются пустыми и
+    удаляются методом cleanup().
+    """
+
+    def __init__(self, db_engine: AsyncEngine, ttl: Optional[int] = None):
+        self.engine = db_engine
+        self.ttl = ttl or None
+
+    @staticmethod
+    def _pk(key: StorageKey) -> Dict[str, Any]:
+        return {
+            "bot_id": key.bot_id,
+            "chat_id": key.chat_id,
+            "user_id": key.user_id,
+            "thread_id": key.thread_id or 0,
+            "destiny": key.destiny,
+        }
+
+    def _where(self, key: StorageKey):
+        return and_(*(getattr(FSMRecord, name) == value for name, value in self._pk(key).items()))
+
+    def _expires_at(self, now: datetime) -> Optional[datetime]:
+        return now + timedelta(seconds=self.ttl) if self.ttl else None
+
+    async def _upsert(self, key: StorageKey, **values: Any) -> None:
+        """
+        Вставить запись или обновить переданные поля (одним запросом).
+        Остальные поля просроченной записи сбрасываются, как у новой:
+        get_* уже считали её пустой.
+        """
+        now = datetime.utcnow()
+        values.update(updated_at=now, expires_at=self._expires_at(now))
+        stmt = dialect_insert(FSMRecord, self.engine.dialect.name).values(**self._pk(key), **values)
+        if "data" not in values:
+            stmt = stmt.values(data={})
+        expired = FSMRecord.expires_at < now
+        update = dict(values)
+        for name in ("state", "data"):
+            if name not in values:
+                update[name] = case(
+                    (expired, getattr(stmt.excluded, name)),
+                    else_=getattr(FSMRecord, name),
+                )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(self._pk(key)),
+            set_=update,
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(stmt)
+
+    async def _get(self, key: StorageKey, column):
+        now = datetime.utcnow()
+        stmt = select(column).where(
+            self._where(key),
+            or_(FSMRecord.expires_at.is_(None), FSMRecord.expires_at > now),
+        )
+        async with self.engine.connect() as conn:
+            result = await conn.execute(stmt)
+            return result.scalar_one_or_none()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._upsert(key, state=_state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self._get(key, FSMRecord.state)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._upsert(key, data=data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        data = await self._get(key, FSMRecord.data)
+        return dict(data) if data else {}
+
+    async def cleanup(self) -> int:
+        """Удалить просроченные записи"""
+        stmt = delete(FSMRecord).where(FSMRecord.expires_at < datetime.utcnow())
+        async with self.engine.begin() as conn:
+            result = await conn.execute(stmt)
+        return result.rowcount or 0
+
+    async def close(self) -> None:
+        # Движок общий с остальным приложением — закрывается не здесь
+        pass
+
+
+def create_storage() -> BaseStorage:
+    """Создать хранилище FSM согласно настройке FSM_STORAGE"""
+    backend = settings.FSM_STORAGE.lower()
+    ttl = settings.FSM_STATE_TTL or None
+
+    if backend == "redis":
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as e:
+            raise RuntimeError("Для FSM_STORAGE=redis установите пакет redis") from e
+        logger.info("FSM: хранилище Redis")
+        return RedisStorage.from_url(settings.REDIS_URL, state_ttl=ttl, data_ttl=ttl)
+
+    if backend == "memory":
+        logger.info("FSM: хранилище в памяти процесса")
+        return MemoryStorage()
+
+    logger.info("FSM: хранилище в таблице fsm_states")
+    return DatabaseStorage(engine, ttl=ttl)
+
+
+async def cleanup_fsm_states(storage: BaseStorage) -> None:
+    """Периодическая очистка просроченных состояний FSM"""
+    if not isinstance(storage, DatabaseStorage):
+        return
+    try:
+        removed = await storage.cleanup()
+        if removed:
+            logger.info(f"FSM: удалено просроченных состояний: {removed}")
+    except Exception as e:
+        logger.error(f"Ошибка очистки состояний FSM: {e}")
@@ -36,11 +36,16 @@ async def safe_edit_or_send(callback: CallbackQuery, text: str, reply_markup=Non
 
 
 async def are_tests_active(branch: str) -> bool:
-    """Проверить, есть ли активные тесты для филиала"""
+    """Проверить, есть ли активные тесты для филиала (результат кэшируется)"""
+    from database.cache import MISSING, tests_active_cache
     from database.database import async_session_maker
     from database.repositories import TestRepository
 
-    async with async_session_maker() as session:
-        test_repo = TestRepository(session)
-        tests = await test_repo.get_all_tests(branch)
-    return any(t.is_active for t in tests)
+    active = tests_active_cache.get(branch, MISSING)
+    if active is MISSING:
+        # Включение тестов во время запроса не должно перетереться старым ответом
+        generation = tests_active_cache.generation
+        async with async_session_maker() as session:
+            active = await TestRepository(session).has_active_tests(branch)
+        tests_active_cache.set(branch, active, generation=generation)
+    return active
@@ -0,0 +1,72 @@
+"""Приём обновлений через webhook (встроенный aiohttp-сервер)"""
+
+import asyncio
+import logging
+from typing import Any, Dict
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик webhook: сразу отвечает Telegram 200 OK,
+    а обновления обрабатывает в фоне не более чем max_concurrency одновременно.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int, **kwargs: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Поднять aiohttp-сервер, зарегистрировать webhook и работать до остановки"""
+    if not settings.WEBHOOK_BASE_URL:
+        raise RuntimeError("Для режима webhook нужно задать WEBHOOK_BASE_URL")
+    # Секрет должен быть общим для всех экземпляров: иначе последний
+    # запустившийся перепишет его в set_webhook, и остальные будут отвечать 401
+    if not settings.WEBHOOK_SECRET:
+        raise RuntimeError("Для режима webhook нужно задать WEBHOOK_SECRET")
+
+    # Telegram передаёт секрет в заголовке X-Telegram-Bot-Api-Secret-Token
+    secret_token = settings.WEBHOOK_SECRET
+
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        max_concurrency=settings.WEBHOOK_MAX_CONCURRENCY,
+        secret_token=secret_token,
+    )
+    handler.register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.WEBHOOK_HOST, port=settings.WEBHOOK_PORT)
+    await site.start()
+
+    webhook_url = settings.WEBHOOK_BASE_URL.rstrip("/") + settings.WEBHOOK_PATH
+    await bot.set_webhook(
+        url=webhook_url,
+        secret_token=secret_token,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info(
+        f"Webhook зарегистрирован: {webhook_url} "
+        f"(сервер {settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT})"
+    )
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,123 @@
+"""In-process кэши с TTL и ограничением размера"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from config import settings
+from database.invalidation import invalidation_bus
+
+# Маркер отсутствия записи (None — допустимое закэшированное значение)
+MISSING = object()
+
+
+class TTLCache:
+    """LRU-кэш с временем жизни записей.
+
+    Рассчитан на работу внутри одного event loop (без блокировок).
+    Значение None кэшируется наравне с остальными — это позволяет
+    запоминать промахи (например, неавторизованных пользователей).
+    Каждая инвалидация увеличивает generation: значение, прочитанное из
+    БД до инвалидации, кладётся через set(..., generation=...) и
+    отбрасывается, если за время запроса кэш успели сбросить.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Получить значение или default, если записи нет или она устарела"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Положить значение в кэш (вытесняя самые старые записи).
+
+        generation — значение self.generation до чтения из БД; если с тех
+        пор была инвалидация, значение могло устареть и не кэшируется.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удалить запись по ключу"""
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Удалить записи, для которых predicate(key, value) истинно"""
+        self.generation += 1
+        keys = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """Очистить кэш полностью"""
+        self.generation += 1
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Кэш пользователей по telegram_id (используется AuthMiddleware)
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+# Результаты inline-поиска по меню: (филиал, версия каталога, запрос) -> список результатов
+menu_query_cache = TTLCache(maxsize=settings.MENU_QUERY_CACHE_SIZE, ttl=settings.MENU_QUERY_CACHE_TTL)
+
+# Есть ли активные тесты в филиале: филиал -> bool
+tests_active_cache = TTLCache(maxsize=256, ttl=settings.TESTS_ACTIVE_CACHE_TTL)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Сбросить закэшированные записи пользователя по его ID в БД"""
+    user_cache.invalidate_where(lambda _, cached: cached is not None and cached.id == user_id)
+
+
+def _on_users_changed(key) -> None:
+    """Инвалидация темы users: {"user_id": ..., "telegram_id": ...} или None"""
+    if key is None:
+        user_cache.clear()
+        return
+    if key.get("user_id") is not None:
+        invalidate_user(key["user_id"])
+    if key.get("telegram_id") is not None:
+        user_cache.invalidate(key["telegram_id"])
+
+
+invalidation_bus.subscribe("users", _on_users_changed)
+
+
+def _on_tests_changed(branch) -> None:
+    """Инвалидация темы tests: филиал или None"""
+    if branch is None:
+        tests_active_cache.clear()
+    else:
+        tests_active_cache.invalidate(branch)
+
+
+invalidation_bus.subscribe("tests", _on_tests_changed)
+
+
+def _on_menu_changed(_) -> None:
+    """Инвалидация темы menu: выдачи со старой версией каталога больше не нужны"""
+    menu_query_cache.clear()
+
+
+invalidation_bus.subscribe("menu", _on_menu_changed)
@@ -2,6 +2,8 @@ import asyncio
 import logging
 from typing import AsyncGenerator
 
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 from config import settings
@@ -9,10 +11,47 @@ from .models import Base
 
 logger = logging.getLogger(__name__)
 
+
+
+def asyncpg_server_settings(application_name: str = None) -> dict:
+    """Параметры сессии PostgreSQL для соединений asyncpg"""
+    server_settings = {}
+    application_name = application_name or settings.DB_APPLICATION_NAME
+    if application_name:
+        server_settings["application_name"] = application_name
+    if settings.DB_STATEMENT_TIMEOUT:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT)
+    return server_settings
+
+
+def _engine_options() -> dict:
+    """Параметры пула и драйвера из настроек"""
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() != "postgresql":
+        return {}
+
+    options = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "command_timeout": settings.DB_COMMAND_TIMEOUT or None,
+            # Кэш asyncpg и кэш подготовленных выражений диалекта SQLAlchemy
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": asyncpg_server_settings(),
+        }
+    return options
+
+
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
-    pool_pre_ping=True,
+    **_engine_options(),
 )
 
 async_session_maker = async_sessionmaker(
@@ -22,6 +61,18 @@ async_session_maker = async_sessionmaker(
 )
 
 
+def dialect_insert(model, dialect_name: str = None):
+    """INSERT с поддержкой ON CONFLICT (PostgreSQL или SQLite)"""
+    dialect_name = dialect_name or engine.dialect.name
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT не поддерживается для диалекта {dialect_name}")
+    return insert(model)
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Получение сессии БД"""
     async with async_session_maker() as session:
@@ -37,6 +88,7 @@ async def init_db(max_retries: int = 10, retry_delay: float = 3.0):
         try:
             async with engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+            await _check_trigram_search()
             logger.info("База данных инициализирована успешно")
             return
         except Exception as e:
@@ -48,3 +100,45 @@ async def init_db(max_retries: int = 10, retry_delay: float = 3.0):
                 f"Повтор через {retry_delay}с..."
             )
             await asyncio.sleep(retry_delay)
+
+
+async def warm_up_pool():
+    """Заранее открыть DB_POOL_MIN_SIZE соединений, чтобы первые апдейты не ждали подключения"""
+    count = min(settings.DB_POOL_MIN_SIZE, settings.DB_POOL_SIZE)
+    if count <= 0 or engine.dialect.name != "postgresql":
+        return
+    connections = []
+    try:
+        # Соединения удерживаются одновременно, иначе пул выдаст одно и то же
+        for _ in range(count):
+            connection = await engine.connect()
+            connections.append(connection)
+            await connection.execute(text("SELECT 1"))
+        logger.info(f"Пул соединений прогрет: {count}")
+    except Exception as e:
+        logger.warning(f"Не удалось прогреть пул соединений: {e}")
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+async def _check_trigram_search():
+    """Проверить, что индексы нечёткого поиска созданы (миграция 008; только PostgreSQL)"""
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text(
+                "SELECT 1 FROM pg_indexes "
+                "WHERE tablename = 'menu_items' AND indexname = 'ix_menu_items_name_trgm'"
+            ))
+            found = result.scalar() is not None
+    except Exception as e:
+        logger.warning(f"Не удалось проверить индексы нечёткого поиска: {e}")
+        return
+    if not found:
+        # Без расширения поиск работает через индекс в памяти процесса
+        logger.warning(
+            "Триграммные индексы меню не найдены — выполните alembic upgrade head; "
+            "до этого нечёткий поиск будет медленнее или выполняться в приложении"
+        )
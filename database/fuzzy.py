@@ -0,0 +1,70 @@
+"""Нечёткий поиск по триграммам (запасной вариант для БД без pg_trgm)"""
+
+import re
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """Триграммы строки по правилам pg_trgm: слова в нижнем регистре с отступами"""
+    result = set()
+    for word in _WORD_RE.findall((text or "").lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return frozenset(result)
+
+
+def word_similarity(query: FrozenSet[str], target: FrozenSet[str]) -> float:
+    """Доля триграмм запроса, найденных в строке (аналог word_similarity)"""
+    if not query or not target:
+        return 0.0
+    return len(query & target) / len(query)
+
+
+class TrigramIndex:
+    """
+    Неизменяемый триграммный индекс по названию и составу.
+
+    Документы с общими триграммами находятся через обратный индекс,
+    поэтому поиск не сравнивает запрос с каждой позицией.
+    """
+
+    # Совпадение в составе весит меньше совпадения в названии
+    COMPOSITION_WEIGHT = 0.7
+
+    def __init__(self, docs: Iterable[Tuple[Hashable, Optional[str], Optional[str]]]):
+        self._names: Dict[Hashable, FrozenSet[str]] = {}
+        self._compositions: Dict[Hashable, FrozenSet[str]] = {}
+        self._postings: Dict[str, List[Hashable]] = {}
+        for doc_id, name, composition in docs:
+            name_grams = trigrams(name)
+            composition_grams = trigrams(composition)
+            self._names[doc_id] = name_grams
+            self._compositions[doc_id] = composition_grams
+            for gram in name_grams | composition_grams:
+                self._postings.setdefault(gram, []).append(doc_id)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, query: str, threshold: float = 0.35, limit: int = 10) -> List[Tuple[Hashable, float]]:
+        """Найти документы, похожие на запрос: [(id, score)] по убыванию score"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        candidates = set()
+        for gram in query_grams:
+            candidates.update(self._postings.get(gram, ()))
+
+        scored = []
+        for doc_id in candidates:
+            score = max(
+                word_similarity(query_grams, self._names[doc_id]),
+                self.COMPOSITION_WEIGHT * word_similarity(query_grams, self._compositions[doc_id]),
+            )
+            if score >= threshold:
+                scored.append((doc_id, score))
+        scored.sort(key=lambda pair: -pair[1])
+        return scored[:limit]
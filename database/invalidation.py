@@ -0,0 +1,156 @@
+"""Шина инвалидации in-process кэшей между процессами (PostgreSQL LISTEN/NOTIFY)"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Канал уведомлений PostgreSQL
+CHANNEL = "restoran_bot_invalidate"
+# Как часто проверять, что слушающее соединение живо (секунды)
+PING_INTERVAL = 60.0
+# Пауза перед переподключением после обрыва (секунды)
+RECONNECT_DELAY = 5.0
+
+# Идентификатор процесса: свои уведомления применяются локально при коммите
+_ORIGIN = uuid.uuid4().hex[:12]
+# Ключ в Session.info для инвалидаций, ожидающих коммита
+_PENDING = "pending_invalidations"
+
+Handler = Callable[[Any], None]
+
+
+class InvalidationBus:
+    """
+    Публикация и доставка событий «данные темы изменились».
+
+    Репозиторий вызывает publish(session, topic, key) внутри транзакции:
+    в PostgreSQL это pg_notify, который уйдёт подписчикам только после
+    коммита. Обработчики своего процесса вызываются сразу после коммита,
+    остальные процессы получают событие через LISTEN. Обработчик получает
+    key (None — сбросить всё по теме) и удаляет только затронутые записи.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Подписать синхронный обработчик на тему"""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def publish(self, session: AsyncSession, topic: str, key: Any = None) -> None:
+        """Сообщить об изменении (срабатывает при коммите транзакции session)"""
+        session.sync_session.info.setdefault(_PENDING, []).append((topic, key))
+        if session.bind.dialect.name != "postgresql":
+            return
+        payload = json.dumps({"origin": _ORIGIN, "topic": topic, "key": key})
+        await session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": payload},
+        )
+
+    def apply(self, topic: str, key: Any = None) -> None:
+        """Вызвать обработчики темы в этом процессе"""
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(key)
+            except Exception as e:
+                logger.error(f"Инвалидация: ошибка обработчика темы {topic}: {e}")
+
+    def apply_all(self) -> None:
+        """Сбросить все подписанные кэши (после пропуска уведомлений)"""
+        for topic in list(self._handlers):
+            self.apply(topic)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Инвалидация: некорректное уведомление: {payload!r}")
+            return
+        # Свои изменения уже применены при коммите. Порядок уведомлений
+        # соответствует порядку коммитов, а не вызовов publish(), и PostgreSQL
+        # не дублирует их в одном LISTEN-соединении — поэтому без отсева по версии
+        if message.get("origin") == _ORIGIN:
+            return
+        self.apply(message.get("topic"), message.get("key"))
+
+    # ========== ПРОСЛУШИВАНИЕ ==========
+
+    def start(self) -> None:
+        """Подписаться на уведомления других процессов (только PostgreSQL)"""
+        url = make_url(settings.DATABASE_URL)
+        if url.get_backend_name() != "postgresql":
+            return
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._task = asyncio.create_task(self._listen(dsn), name="invalidation-listener")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self, dsn: str) -> None:
+        import asyncpg
+
+        from database.database import asyncpg_server_settings
+
+        application_name = f"{settings.DB_APPLICATION_NAME}:listen" if settings.DB_APPLICATION_NAME else None
+        connected_before = False
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn, server_settings=asyncpg_server_settings(application_name))
+            except Exception as e:
+                logger.warning(f"Инвалидация: не удалось подключиться для LISTEN: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(CHANNEL, self._on_notify)
+                if connected_before:
+                    # Пока соединения не было, уведомления могли потеряться
+                    self.apply_all()
+                connected_before = True
+                logger.info("Инвалидация кэшей: подписка на уведомления активна")
+
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), PING_INTERVAL)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Инвалидация: соединение LISTEN потеряно: {e}")
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+invalidation_bus = InvalidationBus()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    for topic, key in session.info.pop(_PENDING, ()):
+        invalidation_bus.apply(topic, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,126 @@
+"""Каталог меню в памяти процесса: неизменяемые снимки по филиалам"""
+
+import asyncio
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+
+from database.database import async_session_maker
+from database.invalidation import invalidation_bus
+from database.models import MenuItem, MenuItemStatus, MenuType
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogItem(NamedTuple):
+    """Позиция меню (неизменяемая копия строки menu_items)"""
+    id: int
+    name: str
+    description: Optional[str]
+    composition: Optional[str]
+    weight_volume: Optional[str]
+    price: Optional[float]
+    category: str
+    subcategory: Optional[str]
+    menu_type: MenuType
+    status: MenuItemStatus
+    photo: Optional[str]
+    calories: Optional[int]
+    proteins: Optional[float]
+    fats: Optional[float]
+    carbs: Optional[float]
+    branch: str
+
+
+_COLUMNS = [getattr(MenuItem, name) for name in CatalogItem._fields]
+
+
+class BranchMenu:
+    """Снимок меню одного филиала с заранее отсортированными списками"""
+
+    __slots__ = ("version", "_items", "_categories", "_by_category", "_subcategories")
+
+    def __init__(self, version: int, items: List[CatalogItem]):
+        self.version = version
+        self._items: Dict[int, CatalogItem] = {item.id: item for item in items}
+
+        by_category: Dict[Tuple[MenuType, str], List[CatalogItem]] = {}
+        for item in sorted(items, key=lambda i: i.name):
+            by_category.setdefault((item.menu_type, item.category), []).append(item)
+        self._by_category = {key: tuple(value) for key, value in by_category.items()}
+
+        # Категории и подкатегории — только с позициями не в стоп-листе (как в get_categories)
+        categories: Dict[MenuType, set] = {}
+        subcategories: Dict[Tuple[MenuType, str], set] = {}
+        for item in items:
+            if item.status == MenuItemStatus.STOP:
+                continue
+            categories.setdefault(item.menu_type, set()).add(item.category)
+            if item.subcategory:
+                subcategories.setdefault((item.menu_type, item.category), set()).add(item.subcategory)
+        self._categories = {key: tuple(sorted(value)) for key, value in categories.items()}
+        self._subcategories = {key: tuple(sorted(value)) for key, value in subcategories.items()}
+
+    def item(self, item_id: int) -> Optional[CatalogItem]:
+        return self._items.get(item_id)
+
+    def categories(self, menu_type: MenuType) -> Tuple[str, ...]:
+        return self._categories.get(menu_type, ())
+
+    def subcategories(self, category: str, menu_type: MenuType) -> Tuple[str, ...]:
+        return self._subcategories.get((menu_type, category), ())
+
+    def items(self, category: str, menu_type: MenuType, include_stop: bool = False) -> Tuple[CatalogItem, ...]:
+        items = self._by_category.get((menu_type, category), ())
+        if include_stop:
+            return items
+        return tuple(item for item in items if item.status != MenuItemStatus.STOP)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class MenuCatalog:
+    """
+    Read-through кэш меню по филиалам.
+
+    Любое изменение меню (тема menu шины инвалидации, в том числе
+    из другого процесса) увеличивает номер версии (bump). Снимок филиала,
+    собранный на более старой версии, пересобирается при следующем обращении
+    одним запросом; параллельные обращения ждут одну и ту же пересборку.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._branches: Dict[str, BranchMenu] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def bump(self) -> int:
+        """Отметить все снимки устаревшими"""
+        self.version += 1
+        return self.version
+
+    async def get(self, branch: str) -> BranchMenu:
+        """Актуальный снимок меню филиала"""
+        menu = self._branches.get(branch)
+        if menu is not None and menu.version == self.version:
+            return menu
+
+        lock = self._locks.setdefault(branch, asyncio.Lock())
+        async with lock:
+            menu = self._branches.get(branch)
+            if menu is not None and menu.version == self.version:
+                return menu
+            version = self.version
+            async with async_session_maker() as session:
+                result = await session.execute(select(*_COLUMNS).where(MenuItem.branch == branch))
+                items = [CatalogItem(*row) for row in result.all()]
+            menu = BranchMenu(version, items)
+            self._branches[branch] = menu
+            logger.debug(f"Каталог меню «{branch}» пересобран: {len(menu)} позиций, версия {version}")
+            return menu
+
+
+menu_catalog = MenuCatalog()
+invalidation_bus.subscribe("menu", lambda _: menu_catalog.bump())
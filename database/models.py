@@ -13,6 +13,8 @@ from sqlalchemy import (
     Float,
     BigInteger,
     Index,
+    JSON,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -221,3 +223,100 @@ class ChecklistItem(Base):
     order_num: Mapped[int] = mapped_column(Integer, default=0)
     branch: Mapped[str] = mapped_column(String(255), nullable=False, default='Бистро "ГАВРОШ" (Пушкинская 36/69)')
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class FSMRecord(Base):
+    """Состояние FSM пользователя (персистентное хранилище aiogram)"""
+    __tablename__ = "fsm_states"
+    __table_args__ = (
+        Index("ix_fsm_states_expires_at", "expires_at"),
+    )
+
+    bot_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    thread_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, default=0)
+    destiny: Mapped[str] = mapped_column(String(64), primary_key=True, default="default")
+    state: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class TestSessionState(Base):
+    """Незавершённое прохождение теста (одно на пользователя Telegram)"""
+    __tablename__ = "test_sessions"
+    __table_args__ = (
+        Index("ix_test_sessions_deadline", "deadline"),
+        Index("ix_test_sessions_updated_at", "updated_at"),
+    )
+
+    telegram_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    test_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    question_ids: Mapped[list] = mapped_column(JSON, nullable=False)
+    current_index: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    time_limit: Mapped[int] = mapped_column(Integer, nullable=False)  # секунд на вопрос
+    deadline: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    message_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class MediaFile(Base):
+    """Telegram file_id локального файла (чтобы не загружать его повторно)"""
+    __tablename__ = "media_files"
+
+    path: Mapped[str] = mapped_column(String(1024), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256
+    file_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class OutboxMessage(Base):
+    """Исходящее сообщение в очереди отправки (одна запись — один получатель)"""
+    __tablename__ = "outbox"
+    __table_args__ = (
+        UniqueConstraint("idempotency_key", name="uq_outbox_idempotency_key"),
+        Index("ix_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_outbox_batch", "batch"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    idempotency_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    batch: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)  # рассылка, к которой относится
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    photo: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # file_id
+    parse_mode: Mapped[Optional[str]] = mapped_column(String(16), nullable=True, default="HTML")
+    # pending → sending → sent | blocked | failed
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class SyncState(Base):
+    """Отпечаток данных раздела таблицы на момент последней успешной синхронизации"""
+    __tablename__ = "sync_state"
+
+    section: Mapped[str] = mapped_column(String(50), primary_key=True)
+    branch: Mapped[str] = mapped_column(String(255), primary_key=True)
+    digest: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 значений листов
+    synced_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)  # последняя запись в БД
+    checked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)  # последняя проверка
+
+
+class DownloadManifest(Base):
+    """Сведения о скачанном по ссылке файле (для условных повторных загрузок)"""
+    __tablename__ = "download_manifest"
+
+    path: Mapped[str] = mapped_column(String(1024), primary_key=True)
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    etag: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # как в заголовке ответа
+    size: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    checked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
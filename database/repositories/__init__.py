@@ -2,14 +2,25 @@ from .user_repo import UserRepository
 from .menu_repo import MenuRepository
 from .training_repo import TrainingRepository
 from .test_repo import TestRepository
+from .test_session_repo import TestSessionRepository, TestSession
 from .motivation_repo import MotivationRepository
 from .checklist_repo import ChecklistRepository
+from .media_repo import MediaRepository
+from .outbox_repo import OutboxRepository
+from .sync_state_repo import SyncStateRepository
+from .download_manifest_repo import DownloadManifestRepository
 
 __all__ = [
     "UserRepository",
     "MenuRepository",
     "TrainingRepository",
     "TestRepository",
+    "TestSessionRepository",
+    "TestSession",
     "MotivationRepository",
     "ChecklistRepository",
+    "MediaRepository",
+    "OutboxRepository",
+    "SyncStateRepository",
+    "DownloadManifestRepository",
 ]
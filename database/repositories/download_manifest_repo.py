@@ -0,0 +1,42 @@
+from typing import Dict, Iterable, List
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import dialect_insert
+from database.models import DownloadManifest
+
+# Поля записи, которые обновляются при повторной проверке файла
+MANIFEST_FIELDS = ("url", "etag", "last_modified", "size", "sha256")
+
+
+class DownloadManifestRepository:
+    """Репозиторий манифеста скачанных файлов"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_many(self, paths: Iterable[str]) -> Dict[str, DownloadManifest]:
+        """Записи манифеста по путям файлов"""
+        paths = list(paths)
+        if not paths:
+            return {}
+        result = await self.session.execute(
+            select(DownloadManifest).where(DownloadManifest.path.in_(paths))
+        )
+        return {entry.path: entry for entry in result.scalars().all()}
+
+    async def save_many(self, entries: List[dict]) -> None:
+        """Записать или обновить сведения о файлах"""
+        if not entries:
+            return
+        now = datetime.utcnow()
+        rows = [{**entry, "checked_at": now} for entry in entries]
+        stmt = dialect_insert(DownloadManifest, self.session.bind.dialect.name).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["path"],
+            set_={field: stmt.excluded[field] for field in (*MANIFEST_FIELDS, "checked_at")},
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
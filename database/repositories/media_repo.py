@@ -0,0 +1,40 @@
+from typing import Optional
+from datetime import datetime
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import MediaFile
+
+
+class MediaRepository:
+    """Репозиторий file_id загруженных в Telegram файлов"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_file_id(self, path: str, content_hash: str) -> Optional[str]:
+        """file_id файла, если он загружался с тем же содержимым"""
+        result = await self.session.execute(
+            select(MediaFile.file_id).where(
+                MediaFile.path == path,
+                MediaFile.content_hash == content_hash,
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def save(self, path: str, content_hash: str, file_id: str) -> None:
+        """Запомнить file_id файла (заменяя прежний)"""
+        media = await self.session.get(MediaFile, path)
+        if media:
+            media.content_hash = content_hash
+            media.file_id = file_id
+            media.updated_at = datetime.utcnow()
+        else:
+            self.session.add(MediaFile(path=path, content_hash=content_hash, file_id=file_id))
+        await self.session.commit()
+
+    async def delete(self, path: str) -> None:
+        """Забыть file_id файла"""
+        await self.session.execute(delete(MediaFile).where(MediaFile.path == path))
+        await self.session.commit()
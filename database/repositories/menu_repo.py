@@ -1,10 +1,27 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, insert, update, delete, func, or_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from database.invalidation import invalidation_bus
+from database.fuzzy import TrigramIndex
 from database.models import MenuItem, MenuType, MenuItemStatus
 
+# Поля, которые синхронизируются из таблицы (photo и status управляются через админку)
+SHEET_SYNC_FIELDS = (
+    "description", "composition", "weight_volume", "price",
+    "calories", "proteins", "fats", "carbs",
+)
+
+# Минимальная похожесть запроса на название/состав для нечёткого поиска
+SEARCH_THRESHOLD = 0.35
+
+# Установлено ли расширение pg_trgm (проверяется один раз на процесс)
+_pg_trgm_available: Optional[bool] = None
+
+# Триграммные индексы по филиалам для БД без pg_trgm: филиал -> (подпись данных, индекс)
+_fallback_indexes: Dict[str, Tuple[tuple, TrigramIndex]] = {}
+
 
 class MenuRepository:
     """Репозиторий для работы с меню"""
@@ -121,6 +138,7 @@ class MenuRepository:
         """Создать позицию меню"""
         item = MenuItem(**kwargs)
         self.session.add(item)
+        await invalidation_bus.publish(self.session, "menu")
         await self.session.commit()
         await self.session.refresh(item)
         return item
@@ -132,6 +150,7 @@ class MenuRepository:
             .where(MenuItem.id == item_id)
             .values(status=status)
         )
+        await invalidation_bus.publish(self.session, "menu")
         await self.session.commit()
         return True
     
@@ -182,11 +201,17 @@ class MenuRepository:
         if subcategory:
             query = query.where(MenuItem.subcategory == subcategory)
         if search:
-            query = query.where(MenuItem.name.ilike(f"%{search}%"))
+            ranked = await self.search_ids(search, branch, limit=None)
+            query = query.where(MenuItem.id.in_(ranked))
         
         query = query.order_by(MenuItem.menu_type, MenuItem.category, MenuItem.subcategory, MenuItem.name)
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        items = list(result.scalars().all())
+        if search:
+            # С поиском — по убыванию похожести, как в search_by_name
+            position = {item_id: index for index, item_id in enumerate(ranked)}
+            items.sort(key=lambda item: position[item.id])
+        return items
     
     async def update(self, item_id: int, **kwargs) -> Optional[MenuItem]:
         """Обновить позицию меню"""
@@ -195,6 +220,7 @@ class MenuRepository:
             .where(MenuItem.id == item_id)
             .values(**kwargs)
         )
+        await invalidation_bus.publish(self.session, "menu")
         await self.session.commit()
         return await self.get_by_id(item_id)
     
@@ -203,22 +229,90 @@ class MenuRepository:
         result = await self.session.execute(
             delete(MenuItem).where(MenuItem.id == item_id)
         )
+        await invalidation_bus.publish(self.session, "menu")
         await self.session.commit()
         return result.rowcount > 0
     
-    async def search_by_name(self, search: str, branch: str) -> List[MenuItem]:
-        """Поиск позиций меню по названию"""
-        result = await self.session.execute(
-            select(MenuItem)
+    async def search_by_name(self, search: str, branch: str, limit: int = 10) -> List[MenuItem]:
+        """Поиск позиций меню по названию и составу (с опечатками, по похожести)"""
+        ids = await self.search_ids(search, branch, limit=limit)
+        if not ids:
+            return []
+        result = await self.session.execute(select(MenuItem).where(MenuItem.id.in_(ids)))
+        items = {item.id: item for item in result.scalars().all()}
+        return [items[item_id] for item_id in ids if item_id in items]
+
+    async def search_ids(
+        self, search: str, branch: Optional[str], limit: Optional[int] = 10
+    ) -> List[int]:
+        """ID позиций, похожих на запрос, по убыванию похожести"""
+        search = search.strip()
+        if not search:
+            return []
+        if await self._has_pg_trgm():
+            return await self._search_ids_trgm(search, branch, limit)
+        return await self._search_ids_fallback(search, branch, limit)
+
+    async def _has_pg_trgm(self) -> bool:
+        global _pg_trgm_available
+        if self.session.bind.dialect.name != "postgresql":
+            return False
+        if _pg_trgm_available is None:
+            result = await self.session.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            )
+            _pg_trgm_available = result.scalar() is not None
+        return _pg_trgm_available
+
+    async def _search_ids_trgm(self, search: str, branch: Optional[str], limit: Optional[int]) -> List[int]:
+        """Поиск через GIN-индексы pg_trgm"""
+        # Порог для оператора %> действует только в текущей транзакции
+        await self.session.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(SEARCH_THRESHOLD), True))
+        )
+        score = func.greatest(
+            func.word_similarity(search, MenuItem.name),
+            TrigramIndex.COMPOSITION_WEIGHT * func.word_similarity(search, func.coalesce(MenuItem.composition, "")),
+        )
+        query = (
+            select(MenuItem.id)
             .where(
-                MenuItem.branch == branch,
-                MenuItem.name.ilike(f"%{search}%"),
+                or_(
+                    MenuItem.name.op("%>")(search),
+                    MenuItem.composition.op("%>")(search),
+                    MenuItem.name.ilike(f"%{search}%"),
+                )
             )
-            .order_by(MenuItem.name)
-            .limit(10)
+            .order_by(score.desc(), MenuItem.name)
         )
+        if branch:
+            query = query.where(MenuItem.branch == branch)
+        if limit:
+            query = query.limit(limit)
+        result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    async def _search_ids_fallback(self, search: str, branch: Optional[str], limit: Optional[int]) -> List[int]:
+        """Поиск по триграммному индексу в памяти процесса (SQLite и т.п.)"""
+        key = branch or ""
+        signature_query = select(func.count(MenuItem.id), func.max(MenuItem.updated_at))
+        if branch:
+            signature_query = signature_query.where(MenuItem.branch == branch)
+        signature = tuple((await self.session.execute(signature_query)).one())
+
+        cached = _fallback_indexes.get(key)
+        if cached and cached[0] == signature:
+            index = cached[1]
+        else:
+            docs_query = select(MenuItem.id, MenuItem.name, MenuItem.composition)
+            if branch:
+                docs_query = docs_query.where(MenuItem.branch == branch)
+            index = TrigramIndex((await self.session.execute(docs_query)).all())
+            _fallback_indexes[key] = (signature, index)
+
+        matches = index.search(search, threshold=SEARCH_THRESHOLD, limit=limit or len(index))
+        return [item_id for item_id, _ in matches]
+
     async def count_by_type(self, menu_type: MenuType, branch: Optional[str] = None) -> int:
         """Подсчитать количество позиций по типу меню"""
         query = select(func.count(MenuItem.id)).where(MenuItem.menu_type == menu_type)
@@ -227,76 +321,74 @@ class MenuRepository:
         result = await self.session.execute(query)
         return result.scalar() or 0
 
-    async def get_by_natural_key(
-        self, name: str, category: str, menu_type: MenuType, branch: str,
-        subcategory: Optional[str] = None,
-    ) -> Optional[MenuItem]:
-        """Найти позицию по натуральному ключу (название + категория + подкатегория + тип + филиал)"""
-        query = select(MenuItem).where(
-            func.lower(MenuItem.name) == name.lower(),
-            MenuItem.category == category,
-            MenuItem.menu_type == menu_type,
-            MenuItem.branch == branch,
-        )
-        if subcategory is not None:
-            query = query.where(MenuItem.subcategory == subcategory)
-        else:
-            query = query.where(MenuItem.subcategory.is_(None))
-        result = await self.session.execute(query)
-        return result.scalars().first()
+    @staticmethod
+    def _natural_key(name: str, category: str, subcategory: Optional[str], menu_type: MenuType) -> tuple:
+        """Натуральный ключ позиции: название без учёта регистра, категория, подкатегория, тип"""
+        return (name.lower(), category, subcategory, menu_type)
 
-    async def upsert_from_sheet(
-        self, item_data: dict, existing: Optional[MenuItem] = None, commit: bool = False
-    ) -> tuple:
+    async def sync_from_sheet(self, items: List[dict], branch: str) -> Dict[str, int]:
         """
-        Обновить или создать позицию меню из данных таблицы.
-        Не трогает поля: photo, status (они управляются через админку).
-        Возвращает: ("created" | "updated" | "unchanged", MenuItem)
+        Сверить меню филиала с данными таблицы фиксированным набором запросов:
+        одна выборка всех позиций, сравнение по натуральному ключу в памяти,
+        затем одно удаление, одно массовое обновление и одна массовая вставка.
+        Не трогает поля: photo, status. Коммит — на стороне вызывающего.
+        Возвращает: {"created", "updated", "unchanged", "deleted"}
         """
-        sync_fields = [
-            "description", "composition", "weight_volume", "price",
-            "calories", "proteins", "fats", "carbs",
-        ]
+        result = await self.session.execute(
+            select(
+                MenuItem.id, MenuItem.name, MenuItem.category,
+                MenuItem.subcategory, MenuItem.menu_type,
+                *(getattr(MenuItem, field) for field in SHEET_SYNC_FIELDS),
+            )
+            .where(MenuItem.branch == branch)
+            .order_by(MenuItem.id)
+        )
+        existing = {}
+        stale_ids = set()
+        for row in result.all():
+            key = self._natural_key(row.name, row.category, row.subcategory, row.menu_type)
+            if key in existing:
+                stale_ids.add(row.id)  # дубль в БД — оставляем самую раннюю запись
+            else:
+                existing[key] = row
 
-        if existing:
-            changes = {}
-            for field in sync_fields:
-                new_val = item_data.get(field)
-                old_val = getattr(existing, field, None)
-                if new_val != old_val:
-                    changes[field] = new_val
+        # Повторы в таблице: побеждает последняя строка
+        sheet_items = {}
+        for item_data in items:
+            key = self._natural_key(
+                item_data["name"], item_data["category"],
+                item_data.get("subcategory"), item_data["menu_type"],
+            )
+            sheet_items[key] = item_data
 
-            if changes:
-                await self.session.execute(
-                    update(MenuItem)
-                    .where(MenuItem.id == existing.id)
-                    .values(**changes)
-                )
-                if commit:
-                    await self.session.commit()
-                return ("updated", existing)
-            return ("unchanged", existing)
-        else:
-            item = MenuItem(**item_data)
-            self.session.add(item)
-            if commit:
-                await self.session.commit()
-            return ("created", item)
+        to_insert, to_update = [], []
+        unchanged = 0
+        for key, item_data in sheet_items.items():
+            row = existing.pop(key, None)
+            if row is None:
+                to_insert.append(item_data)
+                continue
+            if any(item_data.get(field) != getattr(row, field) for field in SHEET_SYNC_FIELDS):
+                to_update.append({
+                    "id": row.id,
+                    **{field: item_data.get(field) for field in SHEET_SYNC_FIELDS},
+                })
+            else:
+                unchanged += 1
 
-    async def delete_missing(self, keep_ids: set, branch: str, commit: bool = False) -> int:
-        """Удалить позиции, которых больше нет в таблице"""
-        if not keep_ids:
-            # Удалить всё для филиала
-            result = await self.session.execute(
-                delete(MenuItem).where(MenuItem.branch == branch)
+        stale_ids.update(row.id for row in existing.values())
+        if stale_ids:
+            await self.session.execute(
+                delete(MenuItem).where(MenuItem.id.in_(stale_ids))
             )
-        else:
-            result = await self.session.execute(
-                delete(MenuItem).where(
-                    MenuItem.branch == branch,
-                    MenuItem.id.notin_(keep_ids),
-                )
-            )
-        if commit:
-            await self.session.commit()
-        return result.rowcount
+        if to_update:
+            await self.session.execute(update(MenuItem), to_update)
+        if to_insert:
+            await self.session.execute(insert(MenuItem), to_insert)
+
+        return {
+            "created": len(to_insert),
+            "updated": len(to_update),
+            "unchanged": unchanged,
+            "deleted": len(stale_ids),
+        }
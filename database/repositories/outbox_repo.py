@@ -0,0 +1,145 @@
+from typing import Dict, List
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import dialect_insert
+from database.models import OutboxMessage
+
+# Статусы, в которых сообщение ещё может быть отправлено
+ACTIVE_STATUSES = ("pending", "sending")
+
+
+class OutboxRepository:
+    """Репозиторий очереди исходящих сообщений"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue(self, messages: List[dict]) -> int:
+        """
+        Поставить сообщения в очередь.
+        Сообщения с уже известным idempotency_key пропускаются.
+        Возвращает количество новых записей.
+        """
+        inserted = 0
+        # Пачками, чтобы не упереться в лимит параметров одного запроса
+        for start in range(0, len(messages), 1000):
+            stmt = (
+                dialect_insert(OutboxMessage, self.session.bind.dialect.name)
+                .values(messages[start:start + 1000])
+                .on_conflict_do_nothing(index_elements=["idempotency_key"])
+            )
+            result = await self.session.execute(stmt)
+            inserted += result.rowcount or 0
+        await self.session.commit()
+        return inserted
+
+    async def claim(self, limit: int, lease_seconds: int) -> List[OutboxMessage]:
+        """
+        Забрать пачку сообщений, готовых к отправке.
+
+        Строки блокируются через SKIP LOCKED, поэтому несколько воркеров
+        (и процессов) не получают одни и те же сообщения. Забранные записи
+        переходят в статус sending на lease_seconds; если воркер не успел
+        отчитаться (например, процесс упал), они снова станут доступны.
+        """
+        now = datetime.utcnow()
+        ready = (
+            OutboxMessage.status.in_(ACTIVE_STATUSES),
+            OutboxMessage.next_attempt_at <= now,
+        )
+        result = await self.session.execute(
+            select(OutboxMessage.id)
+            .where(*ready)
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ids = list(result.scalars().all())
+        if not ids:
+            await self.session.commit()
+            return []
+        # Условия повторяются в UPDATE: без SKIP LOCKED (SQLite) строку,
+        # уже забранную другим воркером, второй раз не получить
+        result = await self.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids), *ready)
+            .values(
+                status="sending",
+                attempts=OutboxMessage.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+            .returning(OutboxMessage)
+        )
+        messages = list(result.scalars().all())
+        await self.session.commit()
+        return messages
+
+    # Аренда: next_attempt_at, выставленный воркером при claim/renew, служит
+    # меткой владения. Если аренда истекла и запись забрал другой воркер,
+    # метка сменилась — обновления ниже её не затронут и вернут False.
+
+    async def renew(self, message: OutboxMessage, lease_seconds: int) -> bool:
+        """Продлить аренду перед отправкой. False — запись уже не принадлежит воркеру"""
+        lease_until = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        if not await self._set(message, next_attempt_at=lease_until):
+            return False
+        message.next_attempt_at = lease_until
+        return True
+
+    async def mark_sent(self, message: OutboxMessage) -> bool:
+        """Сообщение доставлено"""
+        return await self._set(message, status="sent", sent_at=datetime.utcnow(), last_error=None)
+
+    async def mark_failed(self, message: OutboxMessage, status: str, error: str) -> bool:
+        """Сообщение не будет отправлено (failed — ошибки, blocked — чат недоступен)"""
+        return await self._set(message, status=status, last_error=error[:1000])
+
+    async def reschedule(
+        self, message: OutboxMessage, delay: float, error: str, count_attempt: bool = True
+    ) -> bool:
+        """Повторить отправку через delay секунд"""
+        values = dict(
+            status="pending",
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+            last_error=error[:1000],
+        )
+        if not count_attempt:
+            values["attempts"] = OutboxMessage.attempts - 1
+        return await self._set(message, **values)
+
+    async def _set(self, message: OutboxMessage, **values) -> bool:
+        """Обновить запись, если аренда воркера ещё действует"""
+        result = await self.session.execute(
+            update(OutboxMessage)
+            .where(
+                OutboxMessage.id == message.id,
+                OutboxMessage.status == "sending",
+                OutboxMessage.next_attempt_at == message.next_attempt_at,
+            )
+            .values(**values)
+        )
+        await self.session.commit()
+        return bool(result.rowcount)
+
+    async def get_batch_progress(self, batch: str) -> Dict[str, int]:
+        """Количество сообщений рассылки по статусам"""
+        result = await self.session.execute(
+            select(OutboxMessage.status, func.count(OutboxMessage.id))
+            .where(OutboxMessage.batch == batch)
+            .group_by(OutboxMessage.status)
+        )
+        return {status: count for status, count in result.all()}
+
+    async def delete_finished(self, before: datetime) -> int:
+        """Удалить обработанные сообщения, созданные раньше before"""
+        result = await self.session.execute(
+            delete(OutboxMessage).where(
+                OutboxMessage.status.not_in(ACTIVE_STATUSES),
+                OutboxMessage.created_at < before,
+            )
+        )
+        await self.session.commit()
+        return result.rowcount or 0
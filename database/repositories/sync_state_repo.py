@@ -0,0 +1,44 @@
+from typing import Optional
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import dialect_insert
+from database.models import SyncState
+
+
+class SyncStateRepository:
+    """Репозиторий отпечатков синхронизированных разделов таблицы"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_digest(self, section: str, branch: str) -> Optional[str]:
+        """Отпечаток раздела после последней успешной синхронизации"""
+        result = await self.session.execute(
+            select(SyncState.digest).where(SyncState.section == section, SyncState.branch == branch)
+        )
+        return result.scalar_one_or_none()
+
+    async def save(self, section: str, branch: str, digest: str) -> None:
+        """Запомнить отпечаток успешно записанного раздела"""
+        now = datetime.utcnow()
+        stmt = dialect_insert(SyncState, self.session.bind.dialect.name).values(
+            section=section, branch=branch, digest=digest, synced_at=now, checked_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["section", "branch"],
+            set_={"digest": digest, "synced_at": now, "checked_at": now},
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def touch(self, section: str, branch: str) -> None:
+        """Отметить проверку раздела без изменений"""
+        await self.session.execute(
+            update(SyncState)
+            .where(SyncState.section == section, SyncState.branch == branch)
+            .values(checked_at=datetime.utcnow())
+        )
+        await self.session.commit()
@@ -1,12 +1,16 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, insert, update, delete, func, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from database.invalidation import invalidation_bus
 from database.models import Test, Question, Answer, TestResult, UserRole
 
+# Настройки теста, которые синхронизируются из таблицы
+SHEET_SYNC_FIELDS = ("passing_score", "max_attempts", "time_per_question")
+
 
 class TestRepository:
     """Репозиторий для работы с тестами"""
@@ -27,6 +31,22 @@ class TestRepository:
         )
         return list(result.scalars().all())
     
+    async def has_active_tests(self, branch: str) -> bool:
+        """Есть ли в филиале хотя бы один активный тест"""
+        result = await self.session.execute(
+            select(exists().where(Test.branch == branch, Test.is_active == True))
+        )
+        return bool(result.scalar())
+    
+    async def set_active_for_branch(self, branch: str, is_active: bool) -> int:
+        """Включить или выключить все тесты филиала"""
+        result = await self.session.execute(
+            update(Test).where(Test.branch == branch).values(is_active=is_active)
+        )
+        await invalidation_bus.publish(self.session, "tests", branch)
+        await self.session.commit()
+        return result.rowcount
+    
     async def get_test_with_questions(self, test_id: int) -> Optional[Test]:
         """Получить тест с вопросами и ответами"""
         result = await self.session.execute(
@@ -45,6 +65,15 @@ class TestRepository:
         )
         return result.scalar_one_or_none()
     
+    async def get_question_with_answers(self, question_id: int) -> Optional[Question]:
+        """Получить вопрос с вариантами ответов"""
+        result = await self.session.execute(
+            select(Question)
+            .where(Question.id == question_id)
+            .options(selectinload(Question.answers))
+        )
+        return result.scalar_one_or_none()
+    
     async def get_user_attempts(self, user_id: int, test_id: int) -> int:
         """Получить количество попыток пользователя"""
         result = await self.session.execute(
@@ -119,6 +148,51 @@ class TestRepository:
         
         return results
     
+    async def count_active_by_role_branch(self) -> Dict[Tuple[UserRole, str], int]:
+        """Количество активных тестов по (роль, филиал) одним запросом"""
+        result = await self.session.execute(
+            select(Test.role, Test.branch, func.count(Test.id))
+            .where(Test.is_active == True)
+            .group_by(Test.role, Test.branch)
+        )
+        return {(role, branch): count for role, branch, count in result.all()}
+
+    async def get_best_results_by_users(
+        self, user_ids: List[int]
+    ) -> Dict[int, List[Tuple[float, bool]]]:
+        """
+        Лучший результат по каждому тесту для каждого пользователя одним запросом.
+        Процент и отметка о прохождении берутся из одной попытки: с наибольшим
+        процентом, при равенстве — из последней.
+        Возвращает: {user_id: [(лучший процент, пройден ли тест), ...]}
+        """
+        if not user_ids:
+            return {}
+        ranked = (
+            select(
+                TestResult.user_id,
+                TestResult.percent,
+                TestResult.passed,
+                func.row_number().over(
+                    partition_by=(TestResult.user_id, TestResult.test_id),
+                    order_by=(
+                        TestResult.percent.desc(),
+                        TestResult.completed_at.desc(),
+                        TestResult.id.desc(),
+                    ),
+                ).label("rank"),
+            )
+            .where(TestResult.user_id.in_(user_ids))
+            .subquery()
+        )
+        result = await self.session.execute(
+            select(ranked.c.user_id, ranked.c.percent, ranked.c.passed).where(ranked.c.rank == 1)
+        )
+        best = {}
+        for user_id, percent, passed in result.all():
+            best.setdefault(user_id, []).append((percent, bool(passed)))
+        return best
+
     async def create_test(self, commit: bool = True, **kwargs) -> Test:
         """Создать тест"""
         test = Test(**kwargs)
@@ -196,3 +270,185 @@ class TestRepository:
         query = query.order_by(Test.role, Test.title)
         result = await self.session.execute(query)
         return list(result.scalars().all())
+
+    @staticmethod
+    def _match_questions(existing: List[Question], sheet_questions: List[dict]) -> tuple:
+        """
+        Сопоставить вопросы таблицы с существующими: сначала по тексту,
+        затем оставшиеся — по порядковому номеру.
+        Возвращает: (список совпадений по порядку sheet_questions, несопоставленные вопросы)
+        """
+        unmatched = {q.id: q for q in sorted(existing, key=lambda q: (q.order_num, q.id))}
+        by_text = {}
+        for q in unmatched.values():
+            by_text.setdefault(q.text, q)
+
+        matches = [None] * len(sheet_questions)
+        for i, q_data in enumerate(sheet_questions):
+            q = by_text.get(q_data["text"])
+            if q and q.id in unmatched:
+                matches[i] = unmatched.pop(q.id)
+
+        by_order = {}
+        for q in unmatched.values():
+            by_order.setdefault(q.order_num, q)
+        for i, q_data in enumerate(sheet_questions):
+            if matches[i] is None:
+                q = by_order.get(q_data["order_num"])
+                if q and q.id in unmatched:
+                    matches[i] = unmatched.pop(q.id)
+
+        return matches, list(unmatched.values())
+
+    async def sync_from_sheet(self, tests: List[dict], branch: str) -> Dict[str, int]:
+        """
+        Сверить тесты филиала с таблицей без удаления и пересоздания.
+
+        tests: [{title, role, passing_score, max_attempts, time_per_question,
+                 questions: [{text, order_num, answers: [{text, is_correct}]}]}]
+
+        Тесты сопоставляются по (название, роль, филиал), вопросы — по тексту
+        или порядковому номеру. Вставляется, обновляется и удаляется только
+        изменённое, массовыми запросами; результаты сохранённых тестов
+        не затрагиваются. Коммит — на стороне вызывающего.
+        Возвращает: {"created", "updated", "unchanged", "deleted", "tests", "questions"}
+        """
+        result = await self.session.execute(
+            select(Test)
+            .where(Test.branch == branch)
+            .options(selectinload(Test.questions).selectinload(Question.answers))
+            .order_by(Test.id)
+        )
+        existing = {}
+        stale_tests = []
+        for test in result.scalars().all():
+            key = (test.title, test.role)
+            if key in existing:
+                stale_tests.append(test)  # дубль — оставляем самый ранний тест
+            else:
+                existing[key] = test
+
+        stale_question_ids = set()
+        reanswer_question_ids = set()
+        test_updates, question_updates = [], []
+        new_tests = []       # [(данные теста, вопросы)]
+        new_questions = []   # [(test_id, данные вопроса)] для существующих тестов
+        new_answers = []
+        updated, unchanged = 0, 0
+
+        for test_data in tests:
+            sheet_questions = test_data.get("questions", [])
+            test = existing.pop((test_data["title"], test_data["role"]), None)
+            if test is None:
+                new_tests.append((test_data, sheet_questions))
+                continue
+
+            changed = False
+            if any(test_data[field] != getattr(test, field) for field in SHEET_SYNC_FIELDS):
+                test_updates.append({
+                    "id": test.id,
+                    **{field: test_data[field] for field in SHEET_SYNC_FIELDS},
+                })
+                changed = True
+
+            matches, leftovers = self._match_questions(test.questions, sheet_questions)
+            if leftovers:
+                stale_question_ids.update(q.id for q in leftovers)
+                changed = True
+
+            for q_data, question in zip(sheet_questions, matches):
+                if question is None:
+                    new_questions.append((test.id, q_data))
+                    changed = True
+                    continue
+                if question.text != q_data["text"] or question.order_num != q_data["order_num"]:
+                    question_updates.append({
+                        "id": question.id,
+                        "text": q_data["text"],
+                        "order_num": q_data["order_num"],
+                    })
+                    changed = True
+                old_answers = [(a.text, a.is_correct) for a in sorted(question.answers, key=lambda a: a.id)]
+                if old_answers != [(a["text"], a["is_correct"]) for a in q_data["answers"]]:
+                    reanswer_question_ids.add(question.id)
+                    new_answers.extend(
+                        {"question_id": question.id, **a_data} for a_data in q_data["answers"]
+                    )
+                    changed = True
+
+            if changed:
+                updated += 1
+            else:
+                unchanged += 1
+
+        # Тесты, которых больше нет в таблице, удаляются вместе с результатами
+        stale_tests.extend(existing.values())
+        stale_test_ids = [t.id for t in stale_tests]
+        for test in stale_tests:
+            stale_question_ids.update(q.id for q in test.questions)
+
+        # Удаление: результаты → ответы → вопросы → тесты
+        if stale_test_ids:
+            await self.session.execute(
+                delete(TestResult).where(TestResult.test_id.in_(stale_test_ids))
+            )
+        if stale_question_ids or reanswer_question_ids:
+            await self.session.execute(
+                delete(Answer).where(Answer.question_id.in_(stale_question_ids | reanswer_question_ids))
+            )
+        if stale_question_ids:
+            await self.session.execute(
+                delete(Question).where(Question.id.in_(stale_question_ids))
+            )
+        if stale_test_ids:
+            await self.session.execute(
+                delete(Test).where(Test.id.in_(stale_test_ids))
+            )
+
+        # Обновление изменённых тестов и вопросов
+        if test_updates:
+            await self.session.execute(update(Test), test_updates)
+        if question_updates:
+            await self.session.execute(update(Question), question_updates)
+
+        # Вставка новых тестов → их вопросов → ответов
+        if new_tests:
+            test_ids = await self.session.scalars(
+                insert(Test).returning(Test.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "title": test_data["title"],
+                        "role": test_data["role"],
+                        "branch": branch,
+                        **{field: test_data[field] for field in SHEET_SYNC_FIELDS},
+                    }
+                    for test_data, _ in new_tests
+                ],
+            )
+            for test_id, (_, sheet_questions) in zip(test_ids.all(), new_tests):
+                new_questions.extend((test_id, q_data) for q_data in sheet_questions)
+
+        if new_questions:
+            question_ids = await self.session.scalars(
+                insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                [
+                    {"test_id": test_id, "text": q_data["text"], "order_num": q_data["order_num"]}
+                    for test_id, q_data in new_questions
+                ],
+            )
+            for question_id, (_, q_data) in zip(question_ids.all(), new_questions):
+                new_answers.extend(
+                    {"question_id": question_id, **a_data} for a_data in q_data["answers"]
+                )
+
+        if new_answers:
+            await self.session.execute(insert(Answer), new_answers)
+
+        return {
+            "created": len(new_tests),
+            "updated": updated,
+            "unchanged": unchanged,
+            "deleted": len(stale_test_ids),
+            "tests": len(tests),
+            "questions": sum(len(t.get("questions", [])) for t in tests),
+        }
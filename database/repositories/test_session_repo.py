@@ -0,0 +1,152 @@
+from typing import List, Optional
+from datetime import datetime
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import TestSessionState
+
+
+class TestSession:
+    """Снимок прохождения теста: только идентификаторы и счётчики"""
+
+    __slots__ = (
+        "telegram_id",
+        "test_id",
+        "question_ids",
+        "current_index",
+        "score",
+        "time_limit",
+        "deadline",
+        "chat_id",
+        "message_id",
+    )
+
+    def __init__(
+        self,
+        telegram_id: int,
+        test_id: int,
+        question_ids: List[int],
+        time_limit: int,
+        chat_id: int,
+        message_id: int,
+        current_index: int = 0,
+        score: int = 0,
+        deadline: Optional[datetime] = None,
+    ):
+        self.telegram_id = telegram_id
+        self.test_id = test_id
+        self.question_ids = question_ids
+        self.current_index = current_index
+        self.score = score
+        self.time_limit = time_limit
+        self.deadline = deadline
+        self.chat_id = chat_id
+        self.message_id = message_id
+
+    @classmethod
+    def from_row(cls, row: TestSessionState) -> "TestSession":
+        return cls(**{name: getattr(row, name) for name in cls.__slots__})
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @property
+    def total(self) -> int:
+        return len(self.question_ids)
+
+    @property
+    def finished(self) -> bool:
+        return self.current_index >= self.total
+
+    @property
+    def current_question_id(self) -> Optional[int]:
+        return None if self.finished else self.question_ids[self.current_index]
+
+
+class TestSessionRepository:
+    """Репозиторий незавершённых прохождений тестов"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, telegram_id: int) -> Optional[TestSession]:
+        """Получить активное прохождение пользователя"""
+        row = await self.session.get(TestSessionState, telegram_id)
+        return TestSession.from_row(row) if row else None
+
+    async def start(self, test_session: TestSession) -> None:
+        """Начать прохождение (предыдущее незавершённое отбрасывается)"""
+        await self.session.execute(
+            delete(TestSessionState).where(TestSessionState.telegram_id == test_session.telegram_id)
+        )
+        self.session.add(TestSessionState(**test_session.to_dict(), updated_at=datetime.utcnow()))
+        await self.session.commit()
+
+    async def set_deadline(self, test_session: TestSession, deadline: Optional[datetime]) -> None:
+        """Запомнить срок ответа на текущий вопрос"""
+        await self.session.execute(
+            update(TestSessionState)
+            .where(TestSessionState.telegram_id == test_session.telegram_id)
+            .values(deadline=deadline, updated_at=datetime.utcnow())
+        )
+        await self.session.commit()
+        test_session.deadline = deadline
+
+    async def advance(self, test_session: TestSession, correct: bool) -> bool:
+        """
+        Перейти к следующему вопросу.
+
+        Обновление условное (по current_index), поэтому ответ и таймаут одного
+        вопроса, пришедшие в разные процессы, не засчитываются дважды.
+        Возвращает False, если вопрос уже обработан.
+        """
+        result = await self.session.execute(
+            update(TestSessionState)
+            .where(
+                TestSessionState.telegram_id == test_session.telegram_id,
+                TestSessionState.current_index == test_session.current_index,
+            )
+            .values(
+                current_index=TestSessionState.current_index + 1,
+                score=TestSessionState.score + int(correct),
+                deadline=None,
+                updated_at=datetime.utcnow(),
+            )
+        )
+        await self.session.commit()
+        if result.rowcount != 1:
+            return False
+        test_session.current_index += 1
+        test_session.score += int(correct)
+        test_session.deadline = None
+        return True
+
+    async def delete(self, telegram_id: int) -> None:
+        """Удалить прохождение"""
+        await self.session.execute(
+            delete(TestSessionState).where(TestSessionState.telegram_id == telegram_id)
+        )
+        await self.session.commit()
+
+    async def get_pending(self) -> List[TestSession]:
+        """Прохождения, ожидающие ответа на вопрос (с назначенным сроком)"""
+        result = await self.session.execute(
+            select(TestSessionState).where(TestSessionState.deadline.is_not(None))
+        )
+        return [TestSession.from_row(row) for row in result.scalars().all()]
+
+    async def get_overdue(self, before: datetime) -> List[TestSession]:
+        """Прохождения, в которых срок ответа истёк раньше before"""
+        result = await self.session.execute(
+            select(TestSessionState).where(TestSessionState.deadline < before)
+        )
+        return [TestSession.from_row(row) for row in result.scalars().all()]
+
+    async def delete_idle(self, before: datetime) -> int:
+        """Удалить прохождения без активности с момента before"""
+        result = await self.session.execute(
+            delete(TestSessionState).where(TestSessionState.updated_at < before)
+        )
+        await self.session.commit()
+        return result.rowcount or 0
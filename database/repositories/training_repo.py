@@ -1,10 +1,10 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 from sqlalchemy import select, delete, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import TrainingMaterial, TrainingProgress, UserRole
+from database.models import TrainingMaterial, TrainingProgress, User, UserRole
 
 
 class TrainingRepository:
@@ -184,6 +184,35 @@ class TrainingRepository:
         result = await self.session.execute(query)
         return result.scalar() or 0
 
+    async def count_by_role_branch(self) -> Dict[Tuple[UserRole, str], int]:
+        """Количество материалов по (роль, филиал) одним запросом"""
+        result = await self.session.execute(
+            select(TrainingMaterial.role, TrainingMaterial.branch, func.count(TrainingMaterial.id))
+            .group_by(TrainingMaterial.role, TrainingMaterial.branch)
+        )
+        return {(role, branch): count for role, branch, count in result.all()}
+
+    async def count_completed_by_users(self, user_ids: List[int]) -> Dict[int, int]:
+        """
+        Количество изученных материалов для каждого пользователя одним запросом.
+        Учитываются только материалы его роли и филиала.
+        """
+        if not user_ids:
+            return {}
+        result = await self.session.execute(
+            select(TrainingProgress.user_id, func.count(func.distinct(TrainingProgress.material_id)))
+            .join(TrainingMaterial, TrainingMaterial.id == TrainingProgress.material_id)
+            .join(User, User.id == TrainingProgress.user_id)
+            .where(
+                TrainingProgress.user_id.in_(user_ids),
+                TrainingProgress.is_completed == True,
+                TrainingMaterial.role == User.role,
+                TrainingMaterial.branch == User.branch,
+            )
+            .group_by(TrainingProgress.user_id)
+        )
+        return {user_id: count for user_id, count in result.all()}
+
     async def get_by_natural_key(
         self, title: str, role: UserRole, branch: str
     ) -> Optional[TrainingMaterial]:
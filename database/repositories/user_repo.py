@@ -4,6 +4,7 @@ from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import User, UserRole
+from database.invalidation import invalidation_bus
 
 
 class UserRepository:
@@ -70,6 +71,7 @@ class UserRepository:
             .where(User.id == user_id)
             .values(telegram_id=telegram_id)
         )
+        await invalidation_bus.publish(self.session, "users", {"user_id": user_id, "telegram_id": telegram_id})
         await self.session.commit()
         return True
     
@@ -106,6 +108,9 @@ class UserRepository:
             is_active=True
         )
         self.session.add(user)
+        if telegram_id:
+            # Мог быть закэширован промах по этому telegram_id
+            await invalidation_bus.publish(self.session, "users", {"telegram_id": telegram_id})
         await self.session.commit()
         await self.session.refresh(user)
         return user
@@ -120,12 +125,18 @@ class UserRepository:
             .where(User.id == user_id)
             .values(**kwargs)
         )
-        await self.session.commit()
         
         result = await self.session.execute(
             select(User).where(User.id == user_id)
         )
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+
+        # Сбрасываем кэш: старую привязку и текущий telegram_id (мог быть закэширован промах)
+        await invalidation_bus.publish(
+            self.session, "users", {"user_id": user_id, "telegram_id": user.telegram_id if user else None}
+        )
+        await self.session.commit()
+        return user
     
     async def get_by_id(self, user_id: int) -> Optional[User]:
         """Получить пользователя по ID"""
@@ -0,0 +1,134 @@
+"""Скачивание файлов по ссылкам (материалы обучения) через общую HTTP-сессию"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+import aiohttp
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Размер куска при потоковой записи на диск
+CHUNK_SIZE = 64 * 1024
+
+
+class DownloadResult:
+    """Итог скачивания одного файла"""
+
+    __slots__ = ("path", "size", "seconds", "sha256", "etag", "last_modified", "changed")
+
+    def __init__(
+        self,
+        path: Path,
+        size: int,
+        seconds: float,
+        sha256: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        changed: bool = True,
+    ):
+        self.path = path
+        self.size = size  # байт получено по сети
+        self.seconds = seconds
+        self.sha256 = sha256
+        self.etag = etag
+        self.last_modified = last_modified
+        # False — файл на диске не менялся (304 или то же содержимое)
+        self.changed = changed
+
+
+class FileDownloader:
+    """
+    Загрузчик с одним пулом соединений на процесс.
+
+    Тело ответа пишется кусками во временный файл рядом с целевым, который
+    после успешной загрузки атомарно заменяет его — при обрыве прежний файл
+    остаётся целым. Одновременно идёт не больше DOWNLOAD_CONCURRENCY загрузок.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.DOWNLOAD_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=settings.DOWNLOAD_CONCURRENCY),
+            )
+            self._semaphore = asyncio.Semaphore(settings.DOWNLOAD_CONCURRENCY)
+        return self._session
+
+    async def download(self, url: str, destination: Path, known=None) -> Optional[DownloadResult]:
+        """
+        Скачать файл; None, если скачать не удалось.
+
+        known — прежние сведения о файле (url, etag, last_modified, sha256).
+        Если файл на месте, запрос отправляется условным: на 304 файл не
+        трогается. Если сервер вернул то же содержимое, файл тоже не
+        заменяется (changed=False).
+        """
+        session = self._get_session()
+        headers = {}
+        if known is not None and known.url == url and destination.exists():
+            if known.etag:
+                headers["If-None-Match"] = known.etag
+            if known.last_modified:
+                headers["If-Modified-Since"] = known.last_modified
+
+        temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex[:8]}.part")
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                    if response.status == 304 and headers:
+                        return DownloadResult(
+                            destination, 0, time.perf_counter() - started, known.sha256,
+                            etag or known.etag, last_modified or known.last_modified, changed=False,
+                        )
+                    if response.status != 200:
+                        logger.error(f"Ошибка скачивания файла: HTTP {response.status}")
+                        return None
+
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    size = 0
+                    digest = hashlib.sha256()
+                    async with aiofiles.open(temp_path, "wb") as f:
+                        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                            await f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+
+                sha256 = digest.hexdigest()
+                changed = not (known is not None and known.sha256 == sha256 and destination.exists())
+                if changed:
+                    os.replace(temp_path, destination)
+            except Exception as e:
+                logger.error(f"Ошибка скачивания файла {url}: {e}")
+                return None
+            finally:
+                if temp_path.exists():
+                    temp_path.unlink(missing_ok=True)
+
+        seconds = time.perf_counter() - started
+        if changed:
+            logger.info(f"Файл скачан: {destination} ({size} байт за {seconds:.1f}с)")
+        return DownloadResult(destination, size, seconds, sha256, etag, last_modified, changed)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+downloader = FileDownloader()
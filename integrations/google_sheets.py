@@ -16,18 +16,20 @@
 - Мотивация: Текст сообщения
 """
 
+import hashlib
+import json
 import logging
+import time
 from typing import List, Dict, Any, Optional, Tuple
 import re
-import aiohttp
 import asyncio
 from pathlib import Path
 
-import gspread
-from google.oauth2.service_account import Credentials
+from gspread.utils import absolute_range_name, numericise_all
 
 from config import settings
 from database.models import MenuType, MenuItemStatus, UserRole
+from integrations.sheets_client import sheets_client
 
 logger = logging.getLogger(__name__)
 
@@ -67,12 +69,34 @@ CHECKLIST_SHEETS = {
     "Чек-лист: менеджеры": UserRole.MANAGER,
 }
 
+# Все листы, которые читает полная синхронизация (для пакетного чтения)
+SYNC_SHEETS = [
+    "Доступ",
+    *MENU_SHEETS,
+    *TRAINING_SHEETS,
+    *CHECKLIST_SHEETS,
+    "Аттестация",
+    "Мотивация",
+]
+
+# Разделы синхронизации → листы, из которых они собираются (для отпечатков)
+SYNC_SECTIONS = {
+    "employees": ["Доступ"],
+    "menu": list(MENU_SHEETS),
+    "training": list(TRAINING_SHEETS),
+    "tests": ["Аттестация"],
+    "checklists": list(CHECKLIST_SHEETS),
+    "motivation": ["Мотивация"],
+}
+
 
 class GoogleSheetsSync:
     """Синхронизация данных из Google Sheets в БД"""
 
     def __init__(self):
         self.spreadsheet = None
+        # Снимок листов в памяти: {имя листа: записи}. Заполняется load_snapshot()
+        self._snapshot: Optional[Dict[str, List[Dict[str, Any]]]] = None
     
     @staticmethod
     def convert_drive_url_to_direct(url: str) -> Optional[str]:
@@ -114,70 +138,90 @@ class GoogleSheetsSync:
         direct_url = f"https://drive.google.com/uc?export=download&id={file_id}"
         return direct_url
     
-    @staticmethod
-    async def download_file(url: str, destination: Path) -> bool:
-        """
-        Скачать файл по ссылке
-        
-        Args:
-            url: URL файла
-            destination: Путь для сохранения
-        
-        Returns:
-            True если успешно, False иначе
-        """
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=60)) as response:
-                    if response.status != 200:
-                        logger.error(f"Ошибка скачивания файла: HTTP {response.status}")
-                        return False
-                    
-                    # Сохраняем файл
-                    destination.parent.mkdir(parents=True, exist_ok=True)
-                    with open(destination, 'wb') as f:
-                        f.write(await response.read())
-                    
-                    logger.info(f"Файл скачан: {destination}")
-                    return True
-        except Exception as e:
-            logger.error(f"Ошибка скачивания файла {url}: {e}")
-            return False
-
     def connect(self) -> bool:
-        """Подключиться к Google Sheets"""
+        """Подключиться к Google Sheets (клиент и таблица общие для процесса)"""
         try:
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-            ]
-            credentials = Credentials.from_service_account_file(
-                settings.GOOGLE_CREDENTIALS_FILE,
-                scopes=scopes,
-            )
-            client = gspread.authorize(credentials)
-            self.spreadsheet = client.open_by_key(settings.GOOGLE_SHEETS_ID)
-            logger.info("Успешное подключение к Google Sheets")
+            self.spreadsheet = sheets_client.spreadsheet()
             return True
         except FileNotFoundError:
             logger.error(f"Файл credentials не найден: {settings.GOOGLE_CREDENTIALS_FILE}")
             return False
         except Exception as e:
             logger.error(f"Ошибка подключения к Google Sheets: {e}")
+            sheets_client.reset_on_error(e)
             return False
 
     def _find_worksheet(self, sheet_name: str):
         """Найти лист по имени (с учётом пробелов)"""
+        return sheets_client.worksheet(sheet_name)
+
+    @staticmethod
+    def _values_to_records(all_values: List[List[Any]]) -> List[Dict[str, Any]]:
+        """
+        Преобразовать значения листа (первая строка — заголовки) в список записей.
+        Как get_all_records: строки дополняются пустыми ячейками до длины
+        заголовков (API не возвращает пустые ячейки в конце строки), числа
+        приводятся к int/float.
+        """
+        if len(all_values) < 2:
+            return []
+        headers = all_values[0]
+        # Делаем заголовки уникальными
+        seen = {}
+        unique_headers = []
+        for h in headers:
+            h = str(h).strip()
+            if h in seen:
+                seen[h] += 1
+                unique_headers.append(f"{h}_{seen[h]}")
+            else:
+                seen[h] = 0
+                unique_headers.append(h)
+        records = []
+        width = len(unique_headers)
+        for row in all_values[1:]:
+            row = numericise_all(list(row[:width]) + [""] * (width - len(row)))
+            records.append(dict(zip(unique_headers, row)))
+        return records
+
+    def load_snapshot(self, sheet_names: Optional[List[str]] = None) -> bool:
+        """
+        Прочитать все листы одним запросом values:batchGet.
+        После успешной загрузки read_* работают со снимком в памяти.
+        При ошибке снимок сбрасывается и чтение идёт по листам.
+        """
+        sheet_names = sheet_names or SYNC_SHEETS
         try:
-            return self.spreadsheet.worksheet(sheet_name)
-        except gspread.exceptions.WorksheetNotFound:
-            for ws in self.spreadsheet.worksheets():
-                if ws.title.strip() == sheet_name.strip():
-                    logger.info(f"Лист найден с пробелами: '{ws.title}' -> '{sheet_name}'")
-                    return ws
-            return None
+            # Реальные названия листов (в таблице они бывают с лишними пробелами)
+            worksheets = {}
+            for name in sheet_names:
+                worksheet = sheets_client.worksheet(name)
+                if worksheet is not None:
+                    worksheets[name] = worksheet
+                else:
+                    logger.warning(f"Лист '{name}' не найден в таблице")
+            found = list(worksheets)
+
+            response = self.spreadsheet.values_batch_get(
+                [absolute_range_name(worksheets[name].title) for name in found]
+            )
+
+            snapshot = {name: [] for name in sheet_names}
+            for name, value_range in zip(found, response.get("valueRanges", [])):
+                snapshot[name] = self._values_to_records(value_range.get("values", []))
+            self._snapshot = snapshot
+            logger.info(f"Прочитано {len(found)} листов одним запросом")
+            return True
+        except Exception as e:
+            logger.warning(f"Пакетное чтение листов не удалось, читаем по одному: {e}")
+            sheets_client.reset_on_error(e)
+            self._snapshot = None
+            return False
 
     def _get_sheet_records(self, sheet_name: str) -> List[Dict[str, Any]]:
-        """Получить записи из листа"""
+        """Получить записи из листа (из снимка, если он загружен)"""
+        if self._snapshot is not None and sheet_name in self._snapshot:
+            return self._snapshot[sheet_name]
         try:
             worksheet = self._find_worksheet(sheet_name)
             if not worksheet:
@@ -188,31 +232,10 @@ class GoogleSheetsSync:
                 return records
             except Exception:
                 # Если заголовки неуникальны — читаем вручную
-                all_values = worksheet.get_all_values()
-                if len(all_values) < 2:
-                    return []
-                headers = all_values[0]
-                # Делаем заголовки уникальными
-                seen = {}
-                unique_headers = []
-                for h in headers:
-                    h = h.strip()
-                    if h in seen:
-                        seen[h] += 1
-                        unique_headers.append(f"{h}_{seen[h]}")
-                    else:
-                        seen[h] = 0
-                        unique_headers.append(h)
-                records = []
-                for row in all_values[1:]:
-                    record = {}
-                    for i, val in enumerate(row):
-                        if i < len(unique_headers):
-                            record[unique_headers[i]] = val
-                    records.append(record)
-                return records
+                return self._values_to_records(worksheet.get_all_values())
         except Exception as e:
             logger.error(f"Ошибка чтения листа '{sheet_name}': {e}")
+            sheets_client.reset_on_error(e)
             return []
 
     async def _async_get_sheet_records(self, sheet_name: str) -> List[Dict[str, Any]]:
@@ -313,28 +336,6 @@ class GoogleSheetsSync:
             digits = "7" + digits
         return digits
 
-    def find_employee_by_phone(self, phone: str) -> Optional[Dict[str, Any]]:
-        """
-        Найти сотрудника по телефону в таблице "Доступ".
-        Возвращает dict с данными сотрудника или None если не найден.
-        """
-        if not self.connect():
-            return None
-
-        normalized_input = self._normalize_phone(phone)
-        if len(normalized_input) < 10:
-            return None
-
-        employees = self.read_employees()
-        for emp in employees:
-            if not emp.get("phone"):
-                continue
-            normalized_emp = self._normalize_phone(emp["phone"])
-            if normalized_emp == normalized_input and emp.get("is_active", True):
-                return emp
-
-        return None
-
     # ========== МЕНЮ ==========
 
     def read_menu(self) -> List[Dict[str, Any]]:
@@ -538,273 +539,390 @@ class GoogleSheetsSync:
 
     # ========== ПОЛНАЯ СИНХРОНИЗАЦИЯ ==========
 
-    async def sync_all(self) -> Dict[str, Any]:
+    async def sync_all(self, force: bool = False) -> Dict[str, Any]:
         """
         Выполнить полную синхронизацию всех данных.
         Возвращает отчёт о синхронизации.
+
+        Разделы выполняются конвейером: разбор листов (в пуле потоков) и
+        запись в БД независимых разделов идут параллельно, не более
+        SYNC_CONCURRENCY одновременно на каждом этапе.
+        В report["timings"] — длительность этапов в секундах.
+
+        Раздел, данные которого совпадают с последней успешной синхронизацией
+        (по отпечатку в sync_state), в БД не записывается: {"skipped": True}.
+        force=True записывает все разделы.
         """
         from database.database import async_session_maker
-        from database.repositories import (
-            UserRepository,
-            MenuRepository,
-            TrainingRepository,
-            TestRepository,
-            MotivationRepository,
-            ChecklistRepository,
-        )
+        from database.repositories import SyncStateRepository
+
+        started = time.perf_counter()
 
         if not await self._async_connect():
             return {"success": False, "error": "Не удалось подключиться к Google Sheets"}
 
-        report = {"success": True, "details": {}}
-        branch = settings.DEFAULT_BRANCH
+        report = {"success": True, "details": {}, "timings": {}}
+        report["timings"]["connect"] = round(time.perf_counter() - started, 3)
 
-        # 1. Синхронизация сотрудников
-        try:
+        # Все листы читаем одним запросом, дальше парсеры работают со снимком
+        snapshot_started = time.perf_counter()
+        await asyncio.to_thread(self.load_snapshot)
+        report["timings"]["snapshot"] = round(time.perf_counter() - snapshot_started, 3)
+
+        branch = settings.DEFAULT_BRANCH
+        digests = {}
+        if not force:
             async with async_session_maker() as session:
-                employees = await asyncio.to_thread(self.read_employees)
-                user_repo = UserRepository(session)
-                created, updated, deactivated = 0, 0, 0
+                repo = SyncStateRepository(session)
+                for name in SYNC_SECTIONS:
+                    digests[name] = await repo.get_digest(name, branch)
+
+        limit = max(1, settings.SYNC_CONCURRENCY)
+        fetch_slots = asyncio.Semaphore(limit)
+        db_slots = asyncio.Semaphore(limit)
+
+        # Разделы пишут в разные таблицы и не зависят друг от друга.
+        # refresh — что делать, если лист не изменился (None — ничего):
+        # индекс «Доступ» обновляется всегда, файлы обучения могли заменить по той же ссылке
+        sections = (
+            ("employees", "сотрудников", self.read_employees, self._sync_employees, self._refresh_employees),
+            ("menu", "меню", self.read_menu, self._sync_menu, None),
+            ("training", "обучения", self.read_training, self._sync_training, self._refresh_training),
+            ("tests", "тестов", self.read_tests, self._sync_tests, None),
+            ("checklists", "чек-листов", self.read_checklists, self._sync_checklists, None),
+            ("motivation", "мотивации", self.read_motivation, self._sync_motivation, None),
+        )
+        await asyncio.gather(*(
+            self._run_section(
+                report, name, title, read, apply, refresh, branch, digests.get(name), fetch_slots, db_slots
+            )
+            for name, title, read, apply, refresh in sections
+        ))
+        # Разделы в отчёте — в исходном порядке, а не по времени завершения
+        report["details"] = {name: report["details"][name] for name, *_ in sections}
+
+        self._snapshot = None
+        report["timings"]["total"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Синхронизация завершена за {report['timings']['total']}с: {report['timings']}")
+        return report
 
-                for emp in employees:
-                    # Ищем существующего сотрудника по телефону или username
-                    existing = None
-                    if emp["phone"]:
-                        existing = await user_repo.get_by_phone_any(emp["phone"])
-                    if not existing and emp.get("telegram_username"):
-                        existing = await user_repo.get_by_username(emp["telegram_username"])
-
-                    if existing:
-                        update_data = {
-                            "full_name": emp["full_name"],
-                            "role": emp["role"],
-                            "branch": emp["branch"],
-                            "is_active": emp["is_active"],
-                        }
-                        if emp["phone"]:
-                            update_data["phone"] = emp["phone"]
-                        if emp.get("telegram_username"):
-                            update_data["telegram_username"] = emp["telegram_username"]
-                        await user_repo.update(existing.id, **update_data)
-                        if emp["is_active"]:
-                            updated += 1
-                        else:
-                            deactivated += 1
-                    else:
-                        await user_repo.create(
-                            full_name=emp["full_name"],
-                            phone=emp.get("phone"),
-                            role=emp["role"],
-                            branch=emp["branch"],
-                            telegram_username=emp.get("telegram_username"),
-                        )
-                        created += 1
-
-                report["details"]["employees"] = {
-                    "created": created,
-                    "updated": updated,
-                    "deactivated": deactivated,
-                }
-        except Exception as e:
-            logger.error(f"Ошибка синхронизации сотрудников: {e}")
-            report["details"]["employees"] = {"error": str(e)}
+    def _section_digest(self, section: str, data: Any) -> str:
+        """sha256 значений листов раздела (или разобранных данных, если снимка нет)"""
+        sheet_names = SYNC_SECTIONS[section]
+        if self._snapshot is not None and all(name in self._snapshot for name in sheet_names):
+            payload = [self._snapshot[name] for name in sheet_names]
+        else:
+            payload = data
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _read_section(self, section: str, read) -> Tuple[Any, str]:
+        """Разобрать раздел и посчитать его отпечаток (выполняется в пуле потоков)"""
+        data = read()
+        return data, self._section_digest(section, data)
+
+    async def _run_section(
+        self, report, name, title, read, apply, refresh, branch, last_digest, fetch_slots, db_slots
+    ) -> None:
+        """Прочитать раздел таблицы и записать его в БД, замеряя оба этапа"""
+        from database.database import async_session_maker
+        from database.repositories import SyncStateRepository
 
-        # 2. Синхронизация меню (upsert: обновляем изменённое, не трогаем фото/статусы)
+        timings = report["timings"][name] = {}
         try:
-            async with async_session_maker() as session:
-                menu_items = await asyncio.to_thread(self.read_menu)
-                menu_repo = MenuRepository(session)
-
-                created, updated, unchanged, deleted = 0, 0, 0, 0
-                keep_ids = set()
-
-                for item_data in menu_items:
-                    existing = await menu_repo.get_by_natural_key(
-                        name=item_data["name"],
-                        category=item_data["category"],
-                        menu_type=item_data["menu_type"],
-                        branch=item_data["branch"],
-                        subcategory=item_data.get("subcategory"),
-                    )
-                    action, item = await menu_repo.upsert_from_sheet(item_data, existing)
+            async with fetch_slots:
+                started = time.perf_counter()
+                data, digest = await asyncio.to_thread(self._read_section, name, read)
+                timings["fetch"] = round(time.perf_counter() - started, 3)
+
+            if digest == last_digest:
+                if refresh is None:
+                    report["details"][name] = {"skipped": True}
+                else:
+                    async with db_slots:
+                        started = time.perf_counter()
+                        report["details"][name] = await refresh(data, branch)
+                        timings["db"] = round(time.perf_counter() - started, 3)
+                async with async_session_maker() as session:
+                    await SyncStateRepository(session).touch(name, branch)
+                return
+
+            async with db_slots:
+                started = time.perf_counter()
+                report["details"][name] = await apply(data, branch)
+                async with async_session_maker() as session:
+                    await SyncStateRepository(session).save(name, branch, digest)
+                timings["db"] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации {title}: {e}")
+            report["details"][name] = {"error": str(e)}
 
-                    if action == "created":
-                        created += 1
-                        await session.flush()  # чтобы получить id
-                    elif action == "updated":
+    async def _sync_employees(self, employees: List[Dict[str, Any]], branch: str) -> Dict[str, int]:
+        """Сотрудники: поиск по телефону или username, обновление или создание"""
+        from database.database import async_session_maker
+        from database.invalidation import invalidation_bus
+        from database.repositories import UserRepository
+        from integrations.roster import employee_roster
+
+        async with async_session_maker() as session:
+            user_repo = UserRepository(session)
+            created, updated, deactivated = 0, 0, 0
+
+            for emp in employees:
+                # Ищем существующего сотрудника по телефону или username
+                existing = None
+                if emp["phone"]:
+                    existing = await user_repo.get_by_phone_any(emp["phone"])
+                if not existing and emp.get("telegram_username"):
+                    existing = await user_repo.get_by_username(emp["telegram_username"])
+
+                if existing:
+                    update_data = {
+                        "full_name": emp["full_name"],
+                        "role": emp["role"],
+                        "branch": emp["branch"],
+                        "is_active": emp["is_active"],
+                    }
+                    if emp["phone"]:
+                        update_data["phone"] = emp["phone"]
+                    if emp.get("telegram_username"):
+                        update_data["telegram_username"] = emp["telegram_username"]
+                    await user_repo.update(existing.id, **update_data)
+                    if emp["is_active"]:
                         updated += 1
                     else:
-                        unchanged += 1
-
-                    keep_ids.add(item.id)
-
-                deleted = await menu_repo.delete_missing(keep_ids, branch)
-                await session.commit()
+                        deactivated += 1
+                else:
+                    await user_repo.create(
+                        full_name=emp["full_name"],
+                        phone=emp.get("phone"),
+                        role=emp["role"],
+                        branch=emp["branch"],
+                        telegram_username=emp.get("telegram_username"),
+                    )
+                    created += 1
 
-                report["details"]["menu"] = {
-                    "created": created,
-                    "updated": updated,
-                    "unchanged": unchanged,
-                    "deleted": deleted,
-                }
-        except Exception as e:
-            logger.error(f"Ошибка синхронизации меню: {e}")
-            report["details"]["menu"] = {"error": str(e)}
+            # Роли, филиалы и активность могли измениться у кого угодно
+            await invalidation_bus.publish(session, "users")
+            await session.commit()
 
-        # 3. Синхронизация обучения (upsert: обновляем изменённое, не затираем файлы)
-        try:
-            async with async_session_maker() as session:
-                materials = await asyncio.to_thread(self.read_training)
-                training_repo = TrainingRepository(session)
+        # Свежий лист «Доступ» — заодно индекс для поиска при авторизации
+        employee_roster.update(employees)
 
-                created, updated, unchanged, deleted = 0, 0, 0, 0
-                files_downloaded = 0
-                keep_ids = set()
+        return {
+            "created": created,
+            "updated": updated,
+            "deactivated": deactivated,
+        }
 
-                for mat_data in materials:
-                    # Обрабатываем ссылку на файл
-                    file_url = mat_data.pop("file_url", None)
+    async def _refresh_employees(self, employees: List[Dict[str, Any]], branch: str) -> Dict[str, Any]:
+        """Лист «Доступ» не изменился: в БД не пишем, но индекс для авторизации освежаем"""
+        from integrations.roster import employee_roster
 
-                    existing = await training_repo.get_by_natural_key(
-                        title=mat_data["title"],
-                        role=mat_data["role"],
-                        branch=mat_data["branch"],
-                    )
+        employee_roster.update(employees)
+        return {"skipped": True}
 
-                    # Скачиваем PDF если есть новая ссылка
-                    if file_url:
-                        direct_url = self.convert_drive_url_to_direct(file_url)
-                        if direct_url:
-                            safe_title = "".join(
-                                c for c in mat_data["title"]
-                                if c.isalnum() or c in (' ', '_')
-                            ).rstrip()
-                            file_path = TEMP_FILES_DIR / f"{safe_title}.pdf"
-
-                            if await self.download_file(direct_url, file_path):
-                                mat_data["file_path"] = str(file_path)
-                                files_downloaded += 1
-                            elif existing and existing.file_path:
-                                mat_data["file_path"] = existing.file_path
-                        elif existing and existing.file_path:
-                            mat_data["file_path"] = existing.file_path
-
-                    action, material = await training_repo.upsert_from_sheet(mat_data, existing)
-
-                    if action == "created":
-                        created += 1
-                        await session.flush()
-                    elif action == "updated":
-                        updated += 1
-                    else:
-                        unchanged += 1
+    async def _sync_menu(self, menu_items: List[Dict[str, Any]], branch: str) -> Dict[str, int]:
+        """Меню: upsert, обновляем изменённое, не трогаем фото/статусы"""
+        from database.database import async_session_maker
+        from database.invalidation import invalidation_bus
+        from database.repositories import MenuRepository
 
-                    keep_ids.add(material.id)
+        async with async_session_maker() as session:
+            counts = await MenuRepository(session).sync_from_sheet(menu_items, branch)
+            await invalidation_bus.publish(session, "menu")
+            await session.commit()
+        return counts
 
-                deleted = await training_repo.delete_missing(keep_ids, branch)
-                await session.commit()
+    async def _download_training_files(self, materials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Скачать файлы материалов по ссылкам (параллельно, условными запросами).
+        Возвращает цели скачивания по материалам, результаты и счётчики.
+        """
+        from bot.media import media_registry
+        from database.database import async_session_maker
+        from database.repositories import DownloadManifestRepository
+        from integrations.downloader import downloader
+
+        targets = []
+        for mat_data in materials:
+            file_url = mat_data.pop("file_url", None)
+            direct_url = self.convert_drive_url_to_direct(file_url) if file_url else None
+            if direct_url:
+                safe_title = "".join(
+                    c for c in mat_data["title"]
+                    if c.isalnum() or c in (' ', '_')
+                ).rstrip()
+                targets.append((direct_url, TEMP_FILES_DIR / f"{safe_title}.pdf"))
+            else:
+                targets.append(None)
 
-                report["details"]["training"] = {
-                    "created": created,
-                    "updated": updated,
-                    "unchanged": unchanged,
-                    "deleted": deleted,
-                    "files_downloaded": files_downloaded,
-                }
-        except Exception as e:
-            logger.error(f"Ошибка синхронизации обучения: {e}")
-            report["details"]["training"] = {"error": str(e)}
+        unique_targets = list(dict.fromkeys(target for target in targets if target))
+        async with async_session_maker() as session:
+            manifest = await DownloadManifestRepository(session).get_many(
+                str(path) for _, path in unique_targets
+            )
 
-        # 4. Синхронизация тестов
-        try:
-            async with async_session_maker() as session:
-                tests, questions_map = await asyncio.to_thread(self.read_tests)
-                test_repo = TestRepository(session)
-
-                await test_repo.delete_all_by_branch(branch, commit=False)
-
-                test_count = 0
-                question_count = 0
-
-                for test_data in tests:
-                    role_str = None
-                    for r_str, r_enum in ROLE_MAP.items():
-                        if r_enum == test_data["role"]:
-                            role_str = r_str
-                            break
-                    map_key = f"{test_data['title']}|{role_str}"
-
-                    test = await test_repo.create_test(
-                        commit=False,
-                        title=test_data["title"],
-                        role=test_data["role"],
-                        passing_score=test_data["passing_score"],
-                        max_attempts=test_data["max_attempts"],
-                        time_per_question=test_data["time_per_question"],
-                        branch=test_data["branch"],
-                    )
-                    test_count += 1
-
-                    questions = questions_map.get(map_key, [])
-                    for q_data in questions:
-                        question = await test_repo.add_question(
-                            test_id=test.id,
-                            text=q_data["text"],
-                            order_num=q_data["order_num"],
-                            commit=False,
-                        )
-                        question_count += 1
-
-                        for a_data in q_data["answers"]:
-                            await test_repo.add_answer(
-                                question_id=question.id,
-                                text=a_data["text"],
-                                is_correct=a_data["is_correct"],
-                                commit=False,
-                            )
-
-                await session.commit()
-                report["details"]["tests"] = {
-                    "tests": test_count,
-                    "questions": question_count,
-                }
-        except Exception as e:
-            logger.error(f"Ошибка синхронизации тестов: {e}")
-            report["details"]["tests"] = {"error": str(e)}
+        # Запросы условные (ETag/Last-Modified), неизменившиеся файлы не перезаписываются
+        download_started = time.perf_counter()
+        results = await asyncio.gather(*(
+            downloader.download(url, path, manifest.get(str(path))) for url, path in unique_targets
+        ))
+        downloaded = dict(zip(unique_targets, results))
+        download_seconds = time.perf_counter() - download_started
+
+        files_downloaded = 0
+        files_unchanged = 0
+        bytes_downloaded = 0
+        manifest_entries = []
+        for (url, path), result in downloaded.items():
+            if not result:
+                continue
+            bytes_downloaded += result.size
+            if result.changed:
+                # Файл заменён — прежний file_id в Telegram больше не подходит
+                await media_registry.invalidate(result.path)
+                files_downloaded += 1
+            else:
+                files_unchanged += 1
+            manifest_entries.append({
+                "path": str(path),
+                "url": url,
+                "etag": result.etag,
+                "last_modified": result.last_modified,
+                "size": result.path.stat().st_size,
+                "sha256": result.sha256,
+            })
+        async with async_session_maker() as session:
+            await DownloadManifestRepository(session).save_many(manifest_entries)
+
+        return {
+            "targets": targets,
+            "downloaded": downloaded,
+            "stats": {
+                "files_downloaded": files_downloaded,
+                "files_unchanged": files_unchanged,
+                "bytes_downloaded": bytes_downloaded,
+                "download_seconds": round(download_seconds, 3),
+            },
+        }
+
+    async def _refresh_training(self, materials: List[Dict[str, Any]], branch: str) -> Dict[str, Any]:
+        """
+        Лист обучения не изменился: проверить только файлы по ссылкам.
+        Если какой-то файл заменили, материалы записываются заново.
+        """
+        files = await self._download_training_files(materials)
+        if not any(result and result.changed for result in files["downloaded"].values()):
+            return {"skipped": True, **files["stats"]}
+        return await self._sync_training(materials, branch, files=files)
+
+    async def _sync_training(
+        self, materials: List[Dict[str, Any]], branch: str, files: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, int]:
+        """Обучение: upsert, обновляем изменённое, не затираем файлы"""
+        from database.database import async_session_maker
+        from database.repositories import TrainingRepository
+
+        # Файлы по ссылкам скачиваются параллельно до записи в БД
+        if files is None:
+            files = await self._download_training_files(materials)
+        targets = files["targets"]
+        downloaded = files["downloaded"]
+
+        async with async_session_maker() as session:
+            training_repo = TrainingRepository(session)
+
+            created, updated, unchanged, deleted = 0, 0, 0, 0
+            keep_ids = set()
+
+            for mat_data, target in zip(materials, targets):
+                existing = await training_repo.get_by_natural_key(
+                    title=mat_data["title"],
+                    role=mat_data["role"],
+                    branch=mat_data["branch"],
+                )
+
+                result = downloaded[target] if target else None
+                if result and not result.changed and existing and existing.file_path:
+                    # Содержимое то же — путь не трогаем, file_id в Telegram остаётся действительным
+                    mat_data["file_path"] = existing.file_path
+                elif result:
+                    mat_data["file_path"] = str(target[1])
+                elif existing and existing.file_path:
+                    mat_data["file_path"] = existing.file_path
+
+                action, material = await training_repo.upsert_from_sheet(mat_data, existing)
+
+                if action == "created":
+                    created += 1
+                    await session.flush()
+                elif action == "updated":
+                    updated += 1
+                else:
+                    unchanged += 1
+
+                keep_ids.add(material.id)
+
+            deleted = await training_repo.delete_missing(keep_ids, branch)
+            await session.commit()
+
+        return {
+            "created": created,
+            "updated": updated,
+            "unchanged": unchanged,
+            "deleted": deleted,
+            **files["stats"],
+        }
+
+    async def _sync_tests(self, data: Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]], branch: str) -> Dict[str, int]:
+        """Тесты с вопросами и ответами"""
+        from database.database import async_session_maker
+        from database.invalidation import invalidation_bus
+        from database.repositories import TestRepository
+
+        tests, questions_map = data
+        # Вопросы сгруппированы по ключу "название|должность"
+        role_names = {r_enum: r_str for r_str, r_enum in ROLE_MAP.items()}
+        for test_data in tests:
+            map_key = f"{test_data['title']}|{role_names[test_data['role']]}"
+            test_data["questions"] = questions_map.get(map_key, [])
+
+        async with async_session_maker() as session:
+            counts = await TestRepository(session).sync_from_sheet(tests, branch)
+            await invalidation_bus.publish(session, "tests", branch)
+            await session.commit()
+        return counts
+
+    async def _sync_checklists(self, checklists: Dict[str, List[Dict[str, Any]]], branch: str) -> Dict[str, int]:
+        """Чек-листы: полная перезаливка филиала"""
+        from database.database import async_session_maker
+        from database.repositories import ChecklistRepository
 
-        # 5. Синхронизация чек-листов
-        try:
-            async with async_session_maker() as session:
-                checklists = await asyncio.to_thread(self.read_checklists)
-                checklist_repo = ChecklistRepository(session)
+        async with async_session_maker() as session:
+            checklist_repo = ChecklistRepository(session)
 
-                await checklist_repo.delete_all_by_branch(branch, commit=False)
+            await checklist_repo.delete_all_by_branch(branch, commit=False)
 
-                total_items = 0
-                for role_value, items in checklists.items():
-                    for item in items:
-                        item["branch"] = branch
-                    count = await checklist_repo.bulk_create(items, commit=False)
-                    total_items += count
+            total_items = 0
+            for role_value, items in checklists.items():
+                for item in items:
+                    item["branch"] = branch
+                count = await checklist_repo.bulk_create(items, commit=False)
+                total_items += count
 
-                await session.commit()
-                report["details"]["checklists"] = {"count": total_items}
-        except Exception as e:
-            logger.error(f"Ошибка синхронизации чек-листов: {e}")
-            report["details"]["checklists"] = {"error": str(e)}
+            await session.commit()
+        return {"count": total_items}
 
-        # 6. Синхронизация мотивации
-        try:
-            async with async_session_maker() as session:
-                messages = await asyncio.to_thread(self.read_motivation)
-                motivation_repo = MotivationRepository(session)
+    async def _sync_motivation(self, messages: List[str], branch: str) -> Dict[str, int]:
+        """Мотивационные сообщения: полная перезаливка"""
+        from database.database import async_session_maker
+        from database.repositories import MotivationRepository
 
-                await motivation_repo.delete_all(commit=False)
-                count = await motivation_repo.bulk_create(messages, commit=False)
-                await session.commit()
-                report["details"]["motivation"] = {"count": count}
-        except Exception as e:
-            logger.error(f"Ошибка синхронизации мотивации: {e}")
-            report["details"]["motivation"] = {"error": str(e)}
+        async with async_session_maker() as session:
+            motivation_repo = MotivationRepository(session)
 
-        return report
+            await motivation_repo.delete_all(commit=False)
+            count = await motivation_repo.bulk_create(messages, commit=False)
+            await session.commit()
+        return {"count": count}
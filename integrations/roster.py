@@ -0,0 +1,118 @@
+"""Кэш листа «Доступ»: поиск сотрудника по телефону и username без чтения таблицы"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from integrations.google_sheets import GoogleSheetsSync
+
+logger = logging.getLogger(__name__)
+
+
+class RosterIndex:
+    """Активные сотрудники из таблицы по нормализованному телефону и username"""
+
+    __slots__ = ("by_phone", "by_username", "loaded_at")
+
+    def __init__(self, employees: List[Dict[str, Any]]):
+        self.by_phone: Dict[str, Dict[str, Any]] = {}
+        self.by_username: Dict[str, Dict[str, Any]] = {}
+        self.loaded_at = time.monotonic()
+        for emp in employees:
+            if not emp.get("is_active", True):
+                continue
+            if emp.get("phone"):
+                self.by_phone.setdefault(GoogleSheetsSync._normalize_phone(emp["phone"]), emp)
+            if emp.get("telegram_username"):
+                self.by_username.setdefault(emp["telegram_username"], emp)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+    def __len__(self) -> int:
+        return len(self.by_phone) + len(self.by_username)
+
+
+class EmployeeRoster:
+    """
+    Индекс листа «Доступ» на процесс.
+
+    Индекс живёт ROSTER_CACHE_TTL секунд. Одновременные обращения к
+    устаревшему индексу ждут одно общее чтение таблицы. Если сотрудник не
+    найден, а индексу больше ROSTER_MISS_REFRESH секунд, таблица
+    перечитывается ещё раз: новичка, добавленного минуту назад, бот найдёт.
+    """
+
+    def __init__(self):
+        self._index: Optional[RosterIndex] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    def update(self, employees: List[Dict[str, Any]]) -> None:
+        """Заменить индекс уже прочитанными данными (например, из полной синхронизации)"""
+        self._index = RosterIndex(employees)
+
+    def invalidate(self) -> None:
+        self._index = None
+
+    async def _load(self) -> Optional[RosterIndex]:
+        sync = GoogleSheetsSync()
+        if not await asyncio.to_thread(sync.connect):
+            return None
+        employees = await asyncio.to_thread(sync.read_employees)
+        index = RosterIndex(employees)
+        logger.info(f"Индекс листа «Доступ» обновлён: {len(employees)} сотрудников")
+        return index
+
+    async def get(self, max_age: Optional[float] = None) -> Optional[RosterIndex]:
+        """Индекс не старше max_age секунд (по умолчанию ROSTER_CACHE_TTL)"""
+        max_age = settings.ROSTER_CACHE_TTL if max_age is None else max_age
+        if self._index is not None and self._index.age <= max_age:
+            return self._index
+
+        if self._loading is None:
+            self._loading = asyncio.create_task(self._load())
+        task = self._loading
+        try:
+            # shield: отмена одного ожидающего не прерывает общее чтение
+            index = await asyncio.shield(task)
+        except Exception as e:
+            logger.error(f"Не удалось прочитать лист «Доступ»: {e}")
+            index = None
+        finally:
+            if self._loading is task and task.done():
+                self._loading = None
+
+        if index is not None:
+            self._index = index
+        # При ошибке чтения лучше устаревший индекс, чем никакого
+        return self._index
+
+    async def _find(self, lookup) -> Optional[Dict[str, Any]]:
+        index = await self.get()
+        if index is None:
+            return None
+        employee = lookup(index)
+        if employee is None and index.age > settings.ROSTER_MISS_REFRESH:
+            index = await self.get(max_age=settings.ROSTER_MISS_REFRESH)
+            employee = lookup(index) if index is not None else None
+        return employee
+
+    async def find_by_phone(self, phone: str) -> Optional[Dict[str, Any]]:
+        """Активный сотрудник с таким телефоном"""
+        normalized = GoogleSheetsSync._normalize_phone(phone)
+        if len(normalized) < 10:
+            return None
+        return await self._find(lambda index: index.by_phone.get(normalized))
+
+    async def find_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        """Активный сотрудник с таким Telegram username"""
+        normalized = GoogleSheetsSync._normalize_username(username)
+        if not normalized:
+            return None
+        return await self._find(lambda index: index.by_username.get(normalized))
+
+
+employee_roster = EmployeeRoster()
@@ -0,0 +1,120 @@
+"""Общий авторизованный клиент Google Sheets на процесс"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import gspread
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+]
+
+# Обновлять токен заранее, если до истечения осталось меньше (секунд)
+TOKEN_REFRESH_MARGIN = 300
+# Перечитывать список листов при промахе не чаще, чем раз в (секунд)
+WORKSHEETS_REFRESH_INTERVAL = 600
+# Ответы API, после которых клиент и таблицу нужно открыть заново
+RESET_STATUS_CODES = (401, 403, 404)
+
+
+class SheetsClientManager:
+    """
+    Авторизованный gspread-клиент и открытая таблица, общие для процесса.
+
+    Файл сервисного аккаунта читается и таблица открывается один раз;
+    HTTP-сессия клиента (пул соединений requests) переиспользуется всеми
+    чтениями. Список листов кэшируется: лист ищется по имени без запроса
+    к API. Методы синхронные (gspread), вызываются из пула потоков.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._credentials: Optional[Credentials] = None
+        self._spreadsheet: Optional[gspread.Spreadsheet] = None
+        self._worksheets: Optional[Dict[str, gspread.Worksheet]] = None
+        self._worksheets_loaded_at = 0.0
+
+    def spreadsheet(self) -> gspread.Spreadsheet:
+        """Открытая таблица (при первом вызове — авторизация и открытие)"""
+        with self._lock:
+            if self._spreadsheet is None:
+                credentials = Credentials.from_service_account_file(
+                    settings.GOOGLE_CREDENTIALS_FILE,
+                    scopes=SCOPES,
+                )
+                client = gspread.authorize(credentials)
+                self._spreadsheet = client.open_by_key(settings.GOOGLE_SHEETS_ID)
+                self._credentials = credentials
+                self._worksheets = None
+                logger.info("Успешное подключение к Google Sheets")
+            return self._spreadsheet
+
+    def worksheets(self, refresh: bool = False) -> Dict[str, gspread.Worksheet]:
+        """Листы таблицы по названию без крайних пробелов"""
+        spreadsheet = self.spreadsheet()
+        with self._lock:
+            if self._worksheets is None or refresh:
+                self._worksheets = {ws.title.strip(): ws for ws in spreadsheet.worksheets()}
+                self._worksheets_loaded_at = time.monotonic()
+            return self._worksheets
+
+    def worksheet(self, sheet_name: str) -> Optional[gspread.Worksheet]:
+        """Лист по имени (с учётом пробелов); None, если такого нет"""
+        name = sheet_name.strip()
+        worksheet = self.worksheets().get(name)
+        if worksheet is None and time.monotonic() - self._worksheets_loaded_at > WORKSHEETS_REFRESH_INTERVAL:
+            # Лист могли добавить после открытия таблицы
+            worksheet = self.worksheets(refresh=True).get(name)
+        return worksheet
+
+    def refresh_token(self) -> bool:
+        """Обновить токен доступа, если он скоро истечёт. True — обновлён"""
+        credentials = self._credentials
+        if credentials is None:
+            return False
+        expiry = credentials.expiry
+        if credentials.valid and expiry and expiry - datetime.utcnow() > timedelta(seconds=TOKEN_REFRESH_MARGIN):
+            return False
+        with self._lock:
+            credentials.refresh(Request())
+        return True
+
+    def reset(self) -> None:
+        """Забыть клиент и таблицу (следующий вызов подключится заново)"""
+        with self._lock:
+            self._credentials = None
+            self._spreadsheet = None
+            self._worksheets = None
+
+    def reset_on_error(self, error: Exception) -> None:
+        """Сбросить клиент, если ошибка говорит о неработающей авторизации или таблице"""
+        if isinstance(error, RefreshError) or (
+            isinstance(error, gspread.exceptions.APIError)
+            and error.response.status_code in RESET_STATUS_CODES
+        ):
+            logger.warning(f"Клиент Google Sheets сброшен после ошибки: {error}")
+            self.reset()
+
+
+sheets_client = SheetsClientManager()
+
+
+async def refresh_sheets_token() -> None:
+    """Фоновое обновление токена, чтобы чтения не ждали его на первом запросе"""
+    try:
+        if await asyncio.to_thread(sheets_client.refresh_token):
+            logger.debug("Токен Google Sheets обновлён")
+    except Exception as e:
+        logger.warning(f"Не удалось обновить токен Google Sheets: {e}")
+        sheets_client.reset_on_error(e)
@@ -0,0 +1,30 @@
+"""Общие фикстуры: чистая БД SQLite в памяти на каждый тест"""
+
+import asyncio
+import os
+
+# Settings требует токен бота при импорте модулей приложения
+os.environ.setdefault("BOT_TOKEN", "1:test")
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database.models import Base
+
+
+@pytest.fixture
+def run_db():
+    """Выполнить async-функцию body(session_maker) на пустой БД и вернуть её результат"""
+    def run(body):
+        async def main():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                return await body(async_sessionmaker(engine, expire_on_commit=False))
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,47 @@
+from database.cache import MISSING, TTLCache
+
+
+def test_set_and_get():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", None)
+    assert cache.get("a") == 1
+    # None — закэшированный промах, а не отсутствие записи
+    assert cache.get("b", MISSING) is None
+    assert cache.get("c", MISSING) is MISSING
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b", MISSING) is MISSING
+    assert cache.get("a") == 1
+
+
+def test_expired_entry_is_missing():
+    cache = TTLCache(maxsize=2, ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a", MISSING) is MISSING
+
+
+def test_set_with_current_generation():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation
+    cache.set("a", 1, generation=generation)
+    assert cache.get("a") == 1
+
+
+def test_set_after_invalidation_is_dropped():
+    cache = TTLCache(maxsize=10, ttl=60)
+    for invalidate in (
+        lambda: cache.invalidate("a"),
+        lambda: cache.invalidate_where(lambda key, value: False),
+        cache.clear,
+    ):
+        generation = cache.generation
+        invalidate()
+        cache.set("a", "stale", generation=generation)
+        assert cache.get("a", MISSING) is MISSING
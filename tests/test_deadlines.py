@@ -0,0 +1,78 @@
+import asyncio
+
+from bot.deadlines import DeadlineScheduler
+
+
+def run_scheduler(body):
+    async def main():
+        fired = []
+
+        async def handler(batch):
+            fired.append(batch)
+
+        scheduler = DeadlineScheduler("test", resolution=0.01)
+        scheduler.start(handler)
+        try:
+            await body(scheduler)
+        finally:
+            await scheduler.stop()
+        return fired, scheduler
+
+    return asyncio.run(main())
+
+
+def test_deadlines_fire_in_order():
+    async def body(scheduler):
+        scheduler.schedule("b", 0.06, "второй")
+        scheduler.schedule("a", 0.02, "первый")
+        await asyncio.sleep(0.15)
+
+    fired, scheduler = run_scheduler(body)
+    assert [item for batch in fired for item in batch] == [("a", "первый"), ("b", "второй")]
+    assert len(scheduler) == 0
+    assert scheduler.stats()["fired_total"] == 2
+
+
+def test_close_deadlines_fire_in_one_batch():
+    async def body(scheduler):
+        for key in range(3):
+            scheduler.schedule(key, 0.02)
+        await asyncio.sleep(0.1)
+
+    fired, _ = run_scheduler(body)
+    assert fired == [[(0, None), (1, None), (2, None)]]
+
+
+def test_cancel_and_reschedule():
+    async def body(scheduler):
+        scheduler.schedule("cancelled", 0.02)
+        scheduler.schedule("moved", 0.02, "старый")
+        assert scheduler.cancel("cancelled")
+        assert not scheduler.cancel("missing")
+        scheduler.schedule("moved", 0.05, "новый")
+        assert "moved" in scheduler and "cancelled" not in scheduler
+        await asyncio.sleep(0.15)
+
+    fired, scheduler = run_scheduler(body)
+    assert fired == [[("moved", "новый")]]
+    assert scheduler.stats()["cancelled_total"] == 1
+
+
+def test_handler_error_does_not_stop_scheduler():
+    async def main():
+        fired = []
+
+        async def handler(batch):
+            fired.extend(batch)
+            raise RuntimeError("сбой обработчика")
+
+        scheduler = DeadlineScheduler("test", resolution=0.01)
+        scheduler.start(handler)
+        scheduler.schedule("first", 0.01)
+        await asyncio.sleep(0.05)
+        scheduler.schedule("second", 0.01)
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return fired
+
+    assert asyncio.run(main()) == [("first", None), ("second", None)]
@@ -0,0 +1,153 @@
+import pytest
+
+from database.models import MenuItemStatus, MenuType
+from database.repositories import MenuRepository
+from database.repositories import menu_repo
+
+BRANCH = "Центр"
+
+
+@pytest.fixture(autouse=True)
+def clear_search_index():
+    # Индекс нечёткого поиска кэшируется на процесс, а БД у каждого теста своя
+    menu_repo._fallback_indexes.clear()
+    yield
+    menu_repo._fallback_indexes.clear()
+
+
+def sheet_item(name, price=100.0, category="Горячее", subcategory=None, branch=BRANCH, **fields):
+    item = dict(
+        name=name, description=None, composition=None, weight_volume=None, price=price,
+        category=category, subcategory=subcategory, menu_type=MenuType.KITCHEN,
+        status=MenuItemStatus.NORMAL, branch=branch,
+        calories=None, proteins=None, fats=None, carbs=None,
+    )
+    item.update(fields)
+    return item
+
+
+def test_sync_from_sheet_creates_items(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = MenuRepository(session)
+            counts = await repo.sync_from_sheet([sheet_item("Борщ"), sheet_item("Плов")], BRANCH)
+            await session.commit()
+            names = sorted(item.name for item in await repo.get_all(BRANCH))
+        return counts, names
+
+    counts, names = run_db(body)
+    assert counts == {"created": 2, "updated": 0, "unchanged": 0, "deleted": 0}
+    assert names == ["Борщ", "Плов"]
+
+
+def test_sync_from_sheet_reconciles_by_natural_key(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = MenuRepository(session)
+            await repo.sync_from_sheet(
+                [sheet_item("Борщ"), sheet_item("Плов"), sheet_item("Суп дня")], BRANCH
+            )
+            await session.commit()
+            borscht = next(item for item in await repo.get_all(BRANCH) if item.name == "Борщ")
+            await repo.update_status(borscht.id, MenuItemStatus.STOP)
+
+            counts = await repo.sync_from_sheet(
+                [
+                    sheet_item("борщ", price=150.0),  # регистр названия не важен
+                    sheet_item("Плов"),
+                    sheet_item("Цезарь", category="Салаты"),
+                ],
+                BRANCH,
+            )
+            await session.commit()
+            session.expire_all()
+            items = {item.name: item for item in await repo.get_all(BRANCH)}
+        return counts, borscht.id, items
+
+    counts, borscht_id, items = run_db(body)
+    assert counts == {"created": 1, "updated": 1, "unchanged": 1, "deleted": 1}
+    assert set(items) == {"Борщ", "Плов", "Цезарь"}
+    # Позиция обновлена на месте: id и статус из админки сохранились
+    assert items["Борщ"].id == borscht_id
+    assert items["Борщ"].price == 150.0
+    assert items["Борщ"].status == MenuItemStatus.STOP
+
+
+def test_sync_from_sheet_keeps_other_branches(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = MenuRepository(session)
+            await repo.sync_from_sheet([sheet_item("Борщ", branch="Север")], "Север")
+            await repo.sync_from_sheet([], BRANCH)
+            await session.commit()
+            return [item.name for item in await repo.get_all("Север")]
+
+    assert run_db(body) == ["Борщ"]
+
+
+def test_sync_from_sheet_collapses_duplicate_rows(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = MenuRepository(session)
+            counts = await repo.sync_from_sheet(
+                [sheet_item("Борщ", price=100.0), sheet_item("БОРЩ", price=120.0)], BRANCH
+            )
+            await session.commit()
+            return counts, [item.price for item in await repo.get_all(BRANCH)]
+
+    counts, prices = run_db(body)
+    assert counts["created"] == 1
+    # Повторы в таблице: побеждает последняя строка
+    assert prices == [120.0]
+
+
+SEARCH_MENU = [
+    sheet_item("Борщ с говядиной", composition="свекла, капуста, говядина"),
+    sheet_item("Цезарь с курицей", category="Салаты", composition="салат романо, курица, пармезан"),
+    sheet_item("Паста карбонара", composition="спагетти, бекон, сливки"),
+    sheet_item("Сырники", category="Завтраки", composition="творог, мука"),
+]
+
+
+def run_search(run_db, queries, **filters):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = MenuRepository(session)
+            await repo.sync_from_sheet([dict(item) for item in SEARCH_MENU], BRANCH)
+            await session.commit()
+            if filters:
+                return [item.name for item in await repo.get_filtered(branch=BRANCH, **filters)]
+            return {query: [item.name for item in await repo.search_by_name(query, BRANCH)] for query in queries}
+
+    return run_db(body)
+
+
+def test_search_by_name_fallback(run_db):
+    results = run_search(run_db, ["борш", "цезар", "карбанара", "говядина борщ", "xyz", "  "])
+    assert results["борш"] == ["Борщ с говядиной"]
+    assert results["цезар"] == ["Цезарь с курицей"]
+    assert results["карбанара"] == ["Паста карбонара"]
+    assert results["говядина борщ"] == ["Борщ с говядиной"]
+    assert results["xyz"] == []
+    assert results["  "] == []
+
+
+def test_search_matches_composition(run_db):
+    assert run_search(run_db, ["курица"])["курица"] == ["Цезарь с курицей"]
+
+
+def test_search_respects_branch(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = MenuRepository(session)
+            await repo.sync_from_sheet([dict(item) for item in SEARCH_MENU], BRANCH)
+            await session.commit()
+            return await repo.search_by_name("борщ", "Север")
+
+    assert run_db(body) == []
+
+
+def test_get_filtered_search_is_ranked(run_db):
+    # В порядке меню «Паста» (Горячее) шла бы раньше «Сырников» (Завтраки)
+    assert run_search(run_db, None, search="паста сырники") == ["Сырники", "Паста карбонара"]
+    assert run_search(run_db, ["паста сырники"])["паста сырники"] == ["Сырники", "Паста карбонара"]
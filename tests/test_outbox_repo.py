@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from database.models import OutboxMessage
+from database.repositories import OutboxRepository
+
+
+def outbox_row(key, chat_id=100, text="Привет", batch=None):
+    now = datetime.utcnow()
+    return {
+        "idempotency_key": key,
+        "batch": batch,
+        "chat_id": chat_id,
+        "text": text,
+        "photo": None,
+        "parse_mode": "HTML",
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+    }
+
+
+class SessionPerCall:
+    """OutboxRepository, каждый вызов которого идёт в отдельной сессии, как у воркеров"""
+
+    def __init__(self, session_maker):
+        self.session_maker = session_maker
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            async with self.session_maker() as session:
+                return await getattr(OutboxRepository(session), name)(*args, **kwargs)
+
+        return call
+
+
+async def expire_lease(session_maker, message_id):
+    async with session_maker() as session:
+        await session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message_id)
+            .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await session.commit()
+
+
+async def load(session_maker, message_id) -> OutboxMessage:
+    async with session_maker() as session:
+        result = await session.execute(select(OutboxMessage).where(OutboxMessage.id == message_id))
+        return result.scalar_one()
+
+
+def test_enqueue_is_idempotent(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        first = await repo.enqueue([outbox_row("news:1"), outbox_row("news:2", chat_id=200)])
+        again = await repo.enqueue([outbox_row("news:1"), outbox_row("news:3", chat_id=300)])
+        return first, again
+
+    assert run_db(body) == (2, 1)
+
+
+def test_claim_leases_messages_once(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        await repo.enqueue([outbox_row(f"news:{i}", chat_id=i) for i in range(3)])
+        first = await repo.claim(2, lease_seconds=120)
+        second = await repo.claim(10, lease_seconds=120)
+        third = await repo.claim(10, lease_seconds=120)
+        return first, second, third
+
+    first, second, third = run_db(body)
+    assert [m.chat_id for m in first] == [0, 1]
+    assert [m.chat_id for m in second] == [2]
+    assert third == []
+    assert all(m.status == "sending" and m.attempts == 1 for m in first + second)
+
+
+def test_mark_sent(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        await repo.enqueue([outbox_row("news:1")])
+        [message] = await repo.claim(10, lease_seconds=120)
+        owned = await repo.mark_sent(message)
+        stored = await load(session_maker, message.id)
+        claimed_again = await repo.claim(10, lease_seconds=120)
+        return owned, stored, claimed_again
+
+    owned, stored, claimed_again = run_db(body)
+    assert owned
+    assert stored.status == "sent" and stored.sent_at is not None
+    assert claimed_again == []
+
+
+def test_reschedule_returns_message_to_queue(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        await repo.enqueue([outbox_row("news:1"), outbox_row("news:2", chat_id=200)])
+        first, second = await repo.claim(10, lease_seconds=120)
+        await repo.reschedule(first, 0, "timeout")
+        # RetryAfter: попытка не засчитывается
+        await repo.reschedule(second, 60, "flood", count_attempt=False)
+        ready = await repo.claim(10, lease_seconds=120)
+        waiting = await load(session_maker, second.id)
+        return ready, waiting
+
+    ready, waiting = run_db(body)
+    assert [(m.idempotency_key, m.attempts, m.last_error) for m in ready] == [("news:1", 2, "timeout")]
+    assert (waiting.status, waiting.attempts) == ("pending", 0)
+
+
+def test_mark_failed(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        await repo.enqueue([outbox_row("news:1")])
+        [message] = await repo.claim(10, lease_seconds=120)
+        await repo.mark_failed(message, "blocked", "Forbidden: bot was blocked by the user")
+        return await load(session_maker, message.id)
+
+    stored = run_db(body)
+    assert stored.status == "blocked"
+    assert stored.last_error.startswith("Forbidden")
+
+
+def test_renew_extends_own_lease(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        await repo.enqueue([outbox_row("news:1")])
+        [message] = await repo.claim(10, lease_seconds=1)
+        renewed = await repo.renew(message, lease_seconds=120)
+        stored = await load(session_maker, message.id)
+        return renewed, stored, message
+
+    renewed, stored, message = run_db(body)
+    assert renewed
+    assert stored.next_attempt_at == message.next_attempt_at
+    assert stored.next_attempt_at > datetime.utcnow() + timedelta(seconds=60)
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_is_rejected(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        await repo.enqueue([outbox_row("news:1")])
+        [stale] = await repo.claim(10, lease_seconds=120)
+        await expire_lease(session_maker, stale.id)
+        [current] = await repo.claim(10, lease_seconds=120)
+
+        # Прежний воркер не должен ни отправить, ни перезаписать статус
+        renewed = await repo.renew(stale, lease_seconds=120)
+        marked = await repo.mark_sent(stale)
+        rescheduled = await repo.reschedule(stale, 0, "timeout")
+        owner_marked = await repo.mark_sent(current)
+        stored = await load(session_maker, current.id)
+        return renewed, marked, rescheduled, owner_marked, stored
+
+    renewed, marked, rescheduled, owner_marked, stored = run_db(body)
+    assert (renewed, marked, rescheduled) == (False, False, False)
+    assert owner_marked
+    assert (stored.status, stored.attempts) == ("sent", 2)
+
+
+def test_batch_progress_and_cleanup(run_db):
+    async def body(session_maker):
+        repo = SessionPerCall(session_maker)
+        await repo.enqueue([outbox_row(f"news:{i}", chat_id=i, batch="news") for i in range(3)])
+        first, second, _ = await repo.claim(10, lease_seconds=120)
+        await repo.mark_sent(first)
+        await repo.mark_failed(second, "failed", "Bad Request: can't parse entities")
+        progress = await repo.get_batch_progress("news")
+        removed = await repo.delete_finished(datetime.utcnow() + timedelta(seconds=1))
+        left = await repo.get_batch_progress("news")
+        return progress, removed, left
+
+    progress, removed, left = run_db(body)
+    assert progress == {"sent": 1, "failed": 1, "sending": 1}
+    assert removed == 2
+    assert left == {"sending": 1}
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import update
+
+from bot.storage import DatabaseStorage
+from database.models import FSMRecord
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+OTHER_KEY = StorageKey(bot_id=1, chat_id=20, user_id=20)
+
+
+async def expire_all(storage: DatabaseStorage) -> None:
+    async with storage.engine.begin() as conn:
+        await conn.execute(update(FSMRecord).values(expires_at=datetime(2000, 1, 1)))
+
+
+def run_storage(run_db, body, ttl=3600):
+    async def wrapper(session_maker):
+        return await body(DatabaseStorage(session_maker.kw["bind"], ttl=ttl))
+
+    return run_db(wrapper)
+
+
+def test_state_and_data_are_independent(run_db):
+    async def body(storage):
+        await storage.set_state(KEY, "Form:name")
+        await storage.set_data(KEY, {"name": "Иван"})
+        await storage.set_state(KEY, "Form:phone")
+        return (
+            await storage.get_state(KEY),
+            await storage.get_data(KEY),
+            await storage.get_state(OTHER_KEY),
+            await storage.get_data(OTHER_KEY),
+        )
+
+    assert run_storage(run_db, body) == ("Form:phone", {"name": "Иван"}, None, {})
+
+
+def test_expired_record_reads_as_empty(run_db):
+    async def body(storage):
+        await storage.set_state(KEY, "Form:name")
+        await storage.set_data(KEY, {"name": "Иван"})
+        await expire_all(storage)
+        return await storage.get_state(KEY), await storage.get_data(KEY)
+
+    assert run_storage(run_db, body) == (None, {})
+
+
+def test_set_state_on_expired_record_does_not_revive_data(run_db):
+    async def body(storage):
+        await storage.set_state(KEY, "Form:name")
+        await storage.set_data(KEY, {"name": "Иван"})
+        await expire_all(storage)
+        await storage.set_state(KEY, "Form:phone")
+        return await storage.get_state(KEY), await storage.get_data(KEY)
+
+    assert run_storage(run_db, body) == ("Form:phone", {})
+
+
+def test_set_data_on_expired_record_does_not_revive_state(run_db):
+    async def body(storage):
+        await storage.set_state(KEY, "Form:name")
+        await expire_all(storage)
+        await storage.set_data(KEY, {"phone": "+7"})
+        return await storage.get_state(KEY), await storage.get_data(KEY)
+
+    assert run_storage(run_db, body) == (None, {"phone": "+7"})
+
+
+def test_cleanup_removes_only_expired(run_db):
+    async def body(storage):
+        await storage.set_state(KEY, "Form:name")
+        await expire_all(storage)
+        await storage.set_state(OTHER_KEY, "Form:name")
+        return await storage.cleanup(), await storage.get_state(OTHER_KEY)
+
+    assert run_storage(run_db, body) == (1, "Form:name")
@@ -0,0 +1,88 @@
+from database import database
+from integrations.google_sheets import GoogleSheetsSync
+
+SECTIONS = ("employees", "menu", "training", "tests", "checklists", "motivation")
+
+
+class FakeSheetsSync(GoogleSheetsSync):
+    """Синхронизация без Google Sheets: листы пустые, запись в БД только считается"""
+
+    def __init__(self, calls):
+        super().__init__()
+        self.calls = calls
+
+    def connect(self) -> bool:
+        return True
+
+    def load_snapshot(self, sheet_names=None) -> bool:
+        self._snapshot = {"Мотивация": [{"Текст сообщения": "Так держать!"}]}
+        return True
+
+    def read_employees(self):
+        return []
+
+    def read_menu(self):
+        return []
+
+    def read_training(self):
+        return []
+
+    def read_tests(self):
+        return [], {}
+
+    def read_checklists(self):
+        return {}
+
+    def read_motivation(self):
+        return ["Так держать!"]
+
+    async def _apply(self, section):
+        self.calls.append(section)
+        return {"count": 0}
+
+    async def _sync_employees(self, data, branch):
+        return await self._apply("employees")
+
+    async def _sync_menu(self, data, branch):
+        return await self._apply("menu")
+
+    async def _sync_training(self, data, branch):
+        return await self._apply("training")
+
+    async def _sync_tests(self, data, branch):
+        return await self._apply("tests")
+
+    async def _sync_checklists(self, data, branch):
+        return await self._apply("checklists")
+
+    async def _sync_motivation(self, data, branch):
+        return await self._apply("motivation")
+
+
+def test_unchanged_sections_are_skipped_but_refreshed(run_db, monkeypatch):
+    async def body(session_maker):
+        monkeypatch.setattr(database, "async_session_maker", session_maker)
+        refreshed = []
+
+        async def refresh(self, data, branch):
+            refreshed.append(branch)
+            return {"skipped": True}
+
+        monkeypatch.setattr(FakeSheetsSync, "_refresh_employees", refresh)
+        monkeypatch.setattr(FakeSheetsSync, "_refresh_training", refresh)
+
+        calls = []
+        first = await FakeSheetsSync(calls).sync_all()
+        written_first = list(calls)
+        second = await FakeSheetsSync(calls).sync_all()
+        written_second = calls[len(written_first):]
+        forced = await FakeSheetsSync(calls).sync_all(force=True)
+        return first, written_first, second, written_second, refreshed, forced
+
+    first, written_first, second, written_second, refreshed, forced = run_db(body)
+    assert sorted(written_first) == sorted(SECTIONS)
+    assert written_second == []
+    assert all(second["details"][section] == {"skipped": True} for section in SECTIONS)
+    # Индекс «Доступ» и файлы обучения проверяются и без изменений в листах
+    assert len(refreshed) == 2
+    assert all(forced["details"][section] == {"count": 0} for section in SECTIONS)
@@ -0,0 +1,33 @@
+from database.repositories import SyncStateRepository
+
+
+def test_save_upserts_digest_per_section_and_branch(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = SyncStateRepository(session)
+            missing = await repo.get_digest("menu", "Центр")
+            await repo.save("menu", "Центр", "aaa")
+            await repo.save("menu", "Центр", "bbb")
+            await repo.save("menu", "Север", "ccc")
+            await repo.save("training", "Центр", "ddd")
+            return (
+                missing,
+                await repo.get_digest("menu", "Центр"),
+                await repo.get_digest("menu", "Север"),
+                await repo.get_digest("training", "Центр"),
+            )
+
+    assert run_db(body) == (None, "bbb", "ccc", "ddd")
+
+
+def test_touch_keeps_digest(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = SyncStateRepository(session)
+            await repo.save("menu", "Центр", "aaa")
+            await repo.touch("menu", "Центр")
+            # Раздела ещё нет — touch ничего не создаёт
+            await repo.touch("tests", "Центр")
+            return await repo.get_digest("menu", "Центр"), await repo.get_digest("tests", "Центр")
+
+    assert run_db(body) == ("aaa", None)
@@ -0,0 +1,137 @@
+from sqlalchemy import func, select
+
+from database import models, repositories
+from database.models import Answer, Question, User, UserRole
+
+# Импорт через модули: классы Test* иначе попадут в сбор тестов pytest
+test_repository = repositories.TestRepository
+
+BRANCH = "Центр"
+
+
+def question(text, order_num, answers=("Да", "Нет"), correct=1):
+    return {
+        "text": text,
+        "order_num": order_num,
+        "answers": [{"text": a, "is_correct": i + 1 == correct} for i, a in enumerate(answers)],
+    }
+
+
+def sheet_test(title, questions, passing_score=70):
+    return {
+        "title": title,
+        "role": UserRole.WAITER,
+        "passing_score": passing_score,
+        "max_attempts": 3,
+        "time_per_question": 30,
+        "branch": BRANCH,
+        "questions": questions,
+    }
+
+
+async def add_user(session) -> int:
+    user = User(full_name="Иван", role=UserRole.WAITER, branch=BRANCH)
+    session.add(user)
+    await session.commit()
+    return user.id
+
+
+def test_sync_from_sheet_is_incremental(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = test_repository(session)
+            first = await repo.sync_from_sheet(
+                [
+                    sheet_test("Сервис", [question("Приветствие", 1), question("Счёт", 2)]),
+                    sheet_test("Бар", [question("Коктейли", 1)]),
+                ],
+                BRANCH,
+            )
+            await session.commit()
+
+            second = await repo.sync_from_sheet(
+                [
+                    sheet_test(
+                        "Сервис",
+                        [question("Приветствие", 1), question("Счёт", 2, correct=2)],
+                        passing_score=80,
+                    ),
+                    sheet_test("Кухня", [question("Ножи", 1)]),
+                ],
+                BRANCH,
+            )
+            await session.commit()
+
+            again = await repo.sync_from_sheet(
+                [
+                    sheet_test(
+                        "Сервис",
+                        [question("Приветствие", 1), question("Счёт", 2, correct=2)],
+                        passing_score=80,
+                    ),
+                    sheet_test("Кухня", [question("Ножи", 1)]),
+                ],
+                BRANCH,
+            )
+            await session.commit()
+            session.expire_all()
+
+            service = await repo.get_test_with_questions(1)
+            answers = {q.text: [(a.text, a.is_correct) for a in q.answers] for q in service.questions}
+            counts = {
+                "questions": (await session.execute(select(func.count(Question.id)))).scalar(),
+                "answers": (await session.execute(select(func.count(Answer.id)))).scalar(),
+            }
+        return first, second, again, service.passing_score, answers, counts
+
+    first, second, again, passing_score, answers, counts = run_db(body)
+    assert first["created"] == 2
+    assert (second["created"], second["updated"], second["deleted"]) == (1, 1, 1)
+    assert (again["created"], again["updated"], again["unchanged"], again["deleted"]) == (0, 0, 2, 0)
+    assert passing_score == 80
+    assert answers["Счёт"] == [("Да", False), ("Нет", True)]
+    assert counts == {"questions": 3, "answers": 6}
+
+
+def test_sync_from_sheet_keeps_results_of_updated_tests(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = test_repository(session)
+            await repo.sync_from_sheet([sheet_test("Сервис", [question("Приветствие", 1)])], BRANCH)
+            await session.commit()
+            user_id = await add_user(session)
+            await repo.save_result(user_id, 1, 1, 1, 100.0, True, BRANCH)
+
+            await repo.sync_from_sheet(
+                [sheet_test("Сервис", [question("Приветствие", 1), question("Счёт", 2)])], BRANCH
+            )
+            await session.commit()
+            return (await session.execute(select(func.count(models.TestResult.id)))).scalar()
+
+    assert run_db(body) == 1
+
+
+def test_best_results_take_percent_and_passed_from_one_attempt(run_db):
+    async def body(session_maker):
+        async with session_maker() as session:
+            repo = test_repository(session)
+            await repo.sync_from_sheet(
+                [
+                    sheet_test("Сервис", [question("Приветствие", 1)]),
+                    sheet_test("Бар", [question("Коктейли", 1)]),
+                ],
+                BRANCH,
+            )
+            await session.commit()
+            user_id = await add_user(session)
+            # Лучший процент — в непройденной попытке (порог позже подняли)
+            await repo.save_result(user_id, 1, 1, 1, 60.0, True, BRANCH)
+            await repo.save_result(user_id, 1, 1, 1, 90.0, False, BRANCH)
+            await repo.save_result(user_id, 2, 1, 1, 50.0, False, BRANCH)
+            await repo.save_result(user_id, 2, 1, 1, 80.0, True, BRANCH)
+            best = await repo.get_best_results_by_users([user_id, user_id + 1])
+        return user_id, best
+
+    user_id, best = run_db(body)
+    assert sorted(best[user_id]) == [(80.0, True), (90.0, False)]
+    assert user_id + 1 not in best